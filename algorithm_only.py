@@ -4,14 +4,151 @@
 只负责控制逻辑，不提供GUI
 """
 import os
-import random
-from typing import List, Dict, Set, Optional
-from collections import defaultdict
+from functools import lru_cache
+from typing import List, Dict, Set, Optional, Tuple
 
 from elevator_saga.client.base_controller import ElevatorController
 from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
 from elevator_saga.core.models import Direction, SimulationEvent
 
+# 电梯状态编码
+IDLE, MOVING, LOADING = 0, 1, 2
+# 方向编码，HEADING_NAMES[h + 1] 得到对应的字符串
+UP, DOWN, NONE = 1, -1, 0
+HEADING_NAMES = ("down", "none", "up")
+HEADING_CODES = {"up": UP, "down": DOWN}
+# 方向在request_masks中的下标
+UP_IDX, DOWN_IDX = 0, 1
+
+
+# 空电梯停靠时本层有人等待: (当前方向, 有上行, 有下行) -> 移动方向(UP=+1/DOWN=-1)
+# 顺当前方向优先，其次反向；不在表中的组合（无方向）按等待人数决定
+_EMPTY_STOP_STEP = {
+    (Direction.UP, True, True): UP,
+    (Direction.UP, True, False): UP,
+    (Direction.UP, False, True): DOWN,
+    (Direction.DOWN, True, True): DOWN,
+    (Direction.DOWN, False, True): DOWN,
+    (Direction.DOWN, True, False): UP,
+}
+
+
+@lru_cache(maxsize=256)
+def _build_zone_table(total: int, total_levels: int) -> Tuple[Tuple[int, ...], Tuple[Tuple[int, int], ...]]:
+    """按电梯序号预计算初始位置和服务区域 - 均匀分布 + 分区策略，结果按(电梯数, 最高楼层)缓存"""
+    if total == 1:
+        return (total_levels // 2,), ((0, total_levels),)
+    
+    segment = (total_levels + 1) / total
+    # 增加区域重叠，避免边界问题
+    overlap = max(1, int(segment * 0.1))
+    home_levels = []
+    zones = []
+    for index in range(total):
+        home_levels.append(min(int(index * segment + segment / 2), total_levels))
+        start = int(index * segment)
+        end = int((index + 1) * segment) if index < total - 1 else total_levels
+        zones.append((max(0, start - overlap), min(total_levels, end + overlap)))
+    return tuple(home_levels), tuple(zones)
+
+
+def _mask_floors(mask: int) -> List[int]:
+    """按升序列出位图中的所有楼层"""
+    floors = []
+    while mask:
+        low = mask & -mask
+        floors.append(low.bit_length() - 1)
+        mask ^= low
+    return floors
+
+
+def _floor_above(mask: int, current: int) -> Optional[int]:
+    """位图中高于current的最低楼层，没有则返回None"""
+    above = mask >> (current + 1)
+    if not above:
+        return None
+    return current + (above & -above).bit_length()
+
+
+def _floor_below(mask: int, current: int) -> Optional[int]:
+    """位图中低于current的最高楼层，没有则返回None"""
+    below = mask & ((1 << current) - 1)
+    if not below:
+        return None
+    return below.bit_length() - 1
+
+
+def _scan_next_floor(queue: int, current: int, heading: int) -> Tuple[int, int]:
+    """SCAN选层 - 继续当前方向直到没有目标，然后反向
+
+    queue为非空的服务队列位图，返回(下一目标楼层, 新方向)
+    """
+    above = _floor_above(queue, current)
+    below = _floor_below(queue, current)
+    
+    if heading != DOWN:
+        if above is not None:
+            return above, UP
+        if below is not None:
+            return below, DOWN
+    else:
+        if below is not None:
+            return below, DOWN
+        if above is not None:
+            return above, UP
+    # 队列中只剩当前楼层
+    return current, NONE
+
+
+def _score_unit(state: int, heading: int, cur: int, zone_lo: int, zone_hi: int,
+                load: int, capacity: int, unit_target: int, target: int, direction: int) -> float:
+    """单台电梯的派梯评分，只接收标量参数；不参与评分时返回-1"""
+    # 空闲电梯 - 距离越近分数越高，在服务区域内加分
+    if state == IDLE:
+        distance = cur - target
+        if distance < 0:
+            distance = -distance
+        return 100 - 2 * distance + (50 if zone_lo <= target <= zone_hi else 0)
+    
+    # 运行中电梯 - 只有同方向且尚未经过呼叫楼层才参与评分
+    if state != MOVING or heading != direction:
+        return -1.0
+    # 呼叫楼层在前方，距离的符号由方向决定，不需要abs
+    distance = target - cur if direction == UP else cur - target
+    if distance <= 0:
+        return -1.0
+    # 负载因子 - 越空越好
+    load_factor = load / capacity
+    if load_factor > 1.0:
+        load_factor = 1.0
+    score = (80 - distance) * (1 - load_factor * 0.5)
+    # 距离当前目标越近，接新任务的优先级越低
+    if unit_target:
+        span = cur - unit_target
+        if span < 0:
+            span = -span
+        ratio = distance / span if span > 1 else distance
+        score *= 1 + (ratio if ratio < 1.0 else 1.0) * 0.3
+    return score
+
+
+def _best_zone_floor(floors: List[int], current: int, zone_lo: int, zone_hi: int) -> int:
+    """结合距离和区域从floors中选出最优楼层；floors非空，同分时取靠前者"""
+    best_score = -1
+    best_floor = floors[0]
+    for f in floors:
+        distance = f - current
+        if distance < 0:
+            distance = -distance
+        # 评分：距离越近，区域匹配度越高，分数越高
+        score = 100 - distance * 2
+        if not zone_lo <= f <= zone_hi:
+            score *= 0.5
+        if score > best_score:
+            best_score = score
+            best_floor = f
+    return best_floor
+
 
 class IntelligentDispatchController(ElevatorController):
     """
@@ -24,25 +161,43 @@ class IntelligentDispatchController(ElevatorController):
         super().__init__(server_url, debug)
         
         # 状态管理 - 整合两版优点
-        self.unit_state: Dict[int, str] = {}
-        self.unit_heading: Dict[int, str] = {}
-        self.service_queue: Dict[int, List[int]] = {}
+        # 以下三项按电梯编号索引，在on_init中按电梯数分配
+        self.unit_state: List[int] = []  # IDLE / MOVING / LOADING
+        self.unit_heading: List[int] = []  # UP / DOWN / NONE
+        self.service_queue: List[int] = []  # 位图，第f位表示需要停靠F{f}
         self.passenger_registry: Dict[int, Dict[int, int]] = {}
         self.elevator_goals: Dict[int, Dict[int, int]] = {}  # 从controller.py借鉴
+        # 每台电梯一个槽位的选层缓存: (队列位图, 当前楼层, 方向) -> (下一楼层, 新方向)
+        self._next_cache: Dict[int, Tuple[int, int, int, int, int]] = {}
         
         # 请求队列管理 - 精确跟踪每个楼层的上下行请求
-        self.request_queue: List[List[bool]] = []  # [floor][direction] 0=up, 1=down
-        self.pending_calls = {"up": set(), "down": set()}
+        self.request_masks: List[int] = [0, 0]  # [上行, 下行]各一个位图，第f位表示F{f}有等待的乘客
+        self._call_batch: Dict[Tuple[int, int], None] = {}  # 本tick内待派梯的(楼层, 方向)，按到达顺序去重
+        # 派梯时的电梯组快照，按elevator_fleet顺序排列
+        self._fleet_uid: List[int] = []  # 电梯编号，初始化后不再变化
+        self._fleet_cur: List[int] = []
+        self._fleet_load: List[int] = []
+        self._fleet_target: List[int] = []
+        # 电梯代理是否提供target_floor/last_tick_direction，在on_init中检查一次
+        self._has_target_floor = False
+        self._has_last_direction = False
         
         # 基本参数
         self.total_levels = 0
         self.unit_capacity = 10
         self.zone_assignment: Dict[int, tuple] = {}  # 分区策略
+        # 服务区域上下界，按电梯编号索引，供热路径直接取值
+        self._zone_lo: List[int] = []
+        self._zone_hi: List[int] = []
+        self._zone_center: List[int] = []
         
         # 统计数据
         self.total_energy = 0  # 总能耗
-        self.move_count = defaultdict(int)  # 每台电梯移动次数
+        self.energy_cost: List[int] = []  # 每台电梯移动一层的基础能耗，按电梯编号索引
+        self.move_count: List[int] = []  # 每台电梯移动次数，按电梯编号索引
+        self._last_floor: List[int] = []  # 上次统计时各电梯所在楼层，按电梯编号索引
         self.user_data = {}  # 记录所有乘客信息
+        self.tick = 0  # 最近一次完成的tick
         
         if debug:
             print("[算法] 智能调度算法已启动")
@@ -52,72 +207,62 @@ class IntelligentDispatchController(ElevatorController):
         self.total_levels = len(floors) - 1
         self.building_floors = floors
         self.elevator_fleet = elevators
+        self._fleet_uid = [unit.id for unit in elevators]
+        self._has_target_floor = bool(elevators) and hasattr(elevators[0], 'target_floor')
+        self._has_last_direction = bool(elevators) and hasattr(elevators[0], 'last_tick_direction')
         
         # 初始化请求队列
-        self.request_queue = [[False, False] for _ in range(len(floors))]
+        self.request_masks = [0, 0]
         
         if self.debug:
             print(f"[算法] 系统初始化 | {len(elevators)}台电梯 | {len(floors)}层楼")
         
+        # 一次性计算所有电梯的初始位置和服务区域
+        home_levels, zones = _build_zone_table(len(elevators), self.total_levels)
+        debug = self.debug
+        self.unit_state = [IDLE] * len(elevators)
+        self.unit_heading = [NONE] * len(elevators)
+        self.service_queue = [0] * len(elevators)
+        self.move_count = [0] * len(elevators)
+        self._last_floor = [0] * len(elevators)
+        self._zone_lo = [0] * len(elevators)
+        self._zone_hi = [0] * len(elevators)
+        self._zone_center = [0] * len(elevators)
+        # 1-3号电梯能耗为1，4号电梯能耗为2
+        self.energy_cost = [2 if uid == 3 else 1 for uid in range(len(elevators))]
+        
         for idx, unit in enumerate(elevators):
-            self.unit_state[unit.id] = "idle"
-            self.unit_heading[unit.id] = "none"
-            self.service_queue[unit.id] = []
             self.passenger_registry[unit.id] = {}
             self.elevator_goals[unit.id] = {}
             
-            # 计算初始位置和服务区域
-            home_level = self._calculate_home_position(idx, len(elevators))
-            self.zone_assignment[unit.id] = self._get_service_zone(idx, len(elevators))
+            home_level = home_levels[idx]
+            # 以实际起始楼层为基准，前往初始位置的行程在之后的tick中正常计入
+            self._last_floor[unit.id] = unit.current_floor
+            self.zone_assignment[unit.id] = zones[idx]
+            self._zone_lo[unit.id], self._zone_hi[unit.id] = zones[idx]
+            self._zone_center[unit.id] = (zones[idx][0] + zones[idx][1]) // 2
             
-            # 移动到初始位置 - 随机分散电梯
-            if random.random() < 0.3:  # 30%概率使用随机分散
-                target_floor = random.randint(0, len(floors) - 1)
-                unit.go_to_floor(target_floor, immediate=True)
-                if self.debug:
-                    print(f"[算法] 电梯{idx + 1} 随机初始化 @ F{target_floor}")
-            else:  # 70%概率使用分区均匀分布
-                unit.go_to_floor(home_level, immediate=True)
-                if self.debug:
-                    print(f"[算法] 电梯{idx + 1} 分区初始化 @ F{home_level}, 区域: {self.zone_assignment[unit.id]}")
-
-    def _calculate_home_position(self, index: int, total: int) -> int:
-        """计算初始位置 - 均匀分布"""
-        if total == 1:
-            return self.total_levels // 2
-        segment = (self.total_levels + 1) / total
-        return min(int(index * segment + segment / 2), self.total_levels)
-
-    def _get_service_zone(self, index: int, total: int) -> tuple:
-        """获取服务区域 - 分区策略"""
-        if total == 1:
-            return (0, self.total_levels)
-        zone_size = (self.total_levels + 1) / total
-        start = int(index * zone_size)
-        end = int((index + 1) * zone_size) if index < total - 1 else self.total_levels
-        # 增加区域重叠，避免边界问题
-        overlap = max(1, int(zone_size * 0.1))
-        adjusted_start = max(0, start - overlap)
-        adjusted_end = min(self.total_levels, end + overlap)
-        return (adjusted_start, adjusted_end)
+            # 移动到初始位置 - 分区均匀分布，结果可复现
+            unit.go_to_floor(home_level, immediate=True)
+            if debug:
+                print(f"[算法] 电梯{idx + 1} 分区初始化 @ F{home_level}, 区域: {self.zone_assignment[unit.id]}")
 
     def on_event_execute_start(self, tick: int, events: List[SimulationEvent], 
                               elevators: List[ProxyElevator], floors: List[ProxyFloor]) -> None:
         """每个tick开始时，检查未服务请求并智能派遣idle电梯"""
-        # 找出所有request的楼层
-        request_floors = []
-        for f in range(len(self.request_queue)):
-            if self.request_queue[f][0] or self.request_queue[f][1]:
-                request_floors.append(f)
-        
-        if not request_floors:
+        request_mask = self.request_masks[UP_IDX] | self.request_masks[DOWN_IDX]
+        if not request_mask:
             return
         
+        # 找出所有request的楼层（升序，保持同分时取低楼层）
+        request_floors = _mask_floors(request_mask)
+        
         # 获取所有非idle电梯的目标楼层
         target_floors = set()
-        for e in elevators:
-            if not e.is_idle and hasattr(e, 'target_floor'):
-                target_floors.add(e.target_floor)
+        if self._has_target_floor:
+            for e in elevators:
+                if not e.is_idle:
+                    target_floors.add(e.target_floor)
         
         # 找出没有电梯去的request楼层
         unserved_requests = [f for f in request_floors if f not in target_floors]
@@ -125,22 +270,10 @@ class IntelligentDispatchController(ElevatorController):
         idle_elevators = [e for e in elevators if e.is_idle]
         for elevator in idle_elevators:
             if unserved_requests:
-                # 结合区域和距离选择最优电梯
-                best_score = -1
-                best_floor = unserved_requests[0]
-                
-                for floor in unserved_requests:
-                    # 计算距离和区域匹配度
-                    distance = abs(elevator.current_floor - floor)
-                    zone_start, zone_end = self.zone_assignment[elevator.id]
-                    in_zone = 1 if zone_start <= floor <= zone_end else 0.5
-                    
-                    # 评分：距离越近，区域匹配度越高，分数越高
-                    score = (100 - distance * 2) * in_zone
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_floor = floor
+                # 结合区域和距离选择最优楼层
+                uid = elevator.id
+                best_floor = _best_zone_floor(unserved_requests, elevator.current_floor,
+                                              self._zone_lo[uid], self._zone_hi[uid])
                 
                 self._assign_task(elevator, best_floor)
                 unserved_requests.remove(best_floor)
@@ -151,11 +284,14 @@ class IntelligentDispatchController(ElevatorController):
     def on_passenger_call(self, passenger: ProxyPassenger, floor: ProxyFloor, direction: str) -> None:
         """处理呼叫 - 智能派梯"""
         call_floor = floor.floor
-        direction_idx = 0 if direction == "up" else 1
+        # 字符串方向只在这里转换一次，内部统一使用整数编码和下标
+        if direction == "up":
+            dir_code, direction_idx = UP, UP_IDX
+        else:
+            dir_code, direction_idx = DOWN, DOWN_IDX
         
         # 更新请求队列
-        self.request_queue[call_floor][direction_idx] = True
-        self.pending_calls[direction].add(floor.floor)
+        self.request_masks[direction_idx] |= 1 << call_floor
         
         # 记录乘客信息
         self.user_data[passenger.id] = {
@@ -166,72 +302,105 @@ class IntelligentDispatchController(ElevatorController):
         }
         
         if self.debug:
-            print(f"[算法] 新呼叫 @ F{floor.floor} → {direction}")
+            print(f"[算法] 新呼叫 @ F{call_floor} → {direction}")
         
-        # 智能派梯
-        self._intelligent_dispatch(floor.floor, direction)
+        # 同一tick内的呼叫先缓存，在on_event_execute_end统一派梯
+        self._call_batch[(call_floor, dir_code)] = None
 
-    def _intelligent_dispatch(self, target_floor: int, direction: str):
-        """智能派梯算法 - 综合评分"""
-        candidates = []
-        
-        for unit in self.elevator_fleet:
-            score = self._calculate_score(unit, target_floor, direction)
-            if score > 0:
-                candidates.append((score, unit.id, unit))
-        
-        if candidates:
-            # 选择评分最高的电梯
-            candidates.sort(reverse=True)
-            _, best_id, best_unit = candidates[0]
+    def _snapshot_fleet(self):
+        """按电梯组顺序读取一次代理属性，得到楼层/载客数/目标楼层三个并列数组"""
+        fleet = self.elevator_fleet
+        self._fleet_cur = [unit.current_floor for unit in fleet]
+        self._fleet_load = [len(unit.passengers) for unit in fleet]
+        if self._has_target_floor:
+            self._fleet_target = [unit.target_floor or 0 for unit in fleet]
+        else:
+            self._fleet_target = [0] * len(fleet)
+
+    def _dispatch_batch(self):
+        """批量派梯 - 每轮在所有待派呼叫中选出评分最高的(呼叫, 电梯)组合"""
+        calls = list(self._call_batch)
+        self._call_batch.clear()
+        debug = self.debug
+        # 整批呼叫共用一次快照，评分时不再逐个读取代理属性
+        self._snapshot_fleet()
+        fleet = self.elevator_fleet
+        
+        while calls:
+            best_pos = -1
+            best_score = 0
+            best_idx = 0
+            for idx, (target_floor, direction) in enumerate(calls):
+                pos, score = self._pick_unit(target_floor, direction)
+                if pos >= 0 and (best_pos < 0 or score > best_score):
+                    best_pos, best_score, best_idx = pos, score, idx
+            
+            # 剩余呼叫都没有合适的电梯，交给空闲电梯调度处理
+            if best_pos < 0:
+                break
+            
+            target_floor, _ = calls.pop(best_idx)
+            best_unit = fleet[best_pos]
             self._assign_task(best_unit, target_floor)
+            # 派梯可能改变该电梯的目标楼层，刷新快照中的对应项
+            if self._has_target_floor:
+                self._fleet_target[best_pos] = best_unit.target_floor or 0
             
-            if self.debug:
-                print(f"[算法] 分配电梯{best_id + 1} 响应 F{target_floor} (评分: {candidates[0][0]:.1f})")
-
-    def _calculate_score(self, unit: ProxyElevator, target_floor: int, direction: str) -> float:
-        """计算派梯评分 - 优化版"""
-        score = 0.0
-        state = self.unit_state[unit.id]
-        
-        # 空闲电梯 - 距离越近分数越高，考虑区域因素
-        if state == "idle":
-            distance = abs(unit.current_floor - target_floor)
-            score = 100 - distance * 2
+            if debug:
+                print(f"[算法] 分配电梯{best_unit.id + 1} 响应 F{target_floor} (评分: {best_score:.1f})")
+
+    def _pick_unit(self, target_floor: int, direction: int) -> Tuple[int, float]:
+        """智能派梯算法 - 基于电梯组快照一次遍历打分，返回(最佳电梯在电梯组中的下标, 评分)，没有时下标为-1"""
+        unit_state = self.unit_state
+        unit_heading = self.unit_heading
+        zone_lo = self._zone_lo
+        zone_hi = self._zone_hi
+        capacity = self.unit_capacity
+        fleet_cur = self._fleet_cur
+        fleet_load = self._fleet_load
+        fleet_target = self._fleet_target
+        best_score = 0
+        best_id = -1
+        best_pos = -1
+        
+        for pos, uid in enumerate(self._fleet_uid):
+            state = unit_state[uid]
+            heading = unit_heading[uid]
+            if state != IDLE and (state != MOVING or heading != direction):
+                continue
+            cur = fleet_cur[pos]
+            score = _score_unit(state, heading, cur, zone_lo[uid], zone_hi[uid], fleet_load[pos], capacity,
+                                fleet_target[pos], target_floor, direction)
+            # 空闲电梯正停在呼叫楼层 - 无需再比较其他电梯，返回其实际评分参与整批比较
+            if state == IDLE and cur == target_floor:
+                return pos, score
             
-            # 在服务区域内加分
-            zone_start, zone_end = self.zone_assignment[unit.id]
-            if zone_start <= target_floor <= zone_end:
-                score += 50
-        
-        # 运行中电梯 - 顺路加分，优化评分计算
-        elif state == "moving":
-            heading = self.unit_heading[unit.id]
-            if heading == direction:
-                # 同方向且在路径上
-                if (heading == "up" and unit.current_floor < target_floor) or \
-                   (heading == "down" and unit.current_floor > target_floor):
-                    distance = abs(unit.current_floor - target_floor)
-                    score = 80 - distance
-                    
-                    # 负载因子 - 越空越好
-                    load_factor = min(1.0, len(unit.passengers) / self.unit_capacity)
-                    score *= (1 - load_factor * 0.5)
-                    
-                    # 距离当前目标越近，接新任务的优先级越低
-                    if hasattr(unit, 'target_floor') and unit.target_floor:
-                        progress = min(1.0, distance / max(1, abs(unit.current_floor - unit.target_floor)))
-                        score *= (1 + progress * 0.3)
-        
-        return score
+            # 选择评分最高的电梯，同分时取编号较大者
+            if score > best_score or (score == best_score and best_pos >= 0 and uid > best_id):
+                best_score = score
+                best_id = uid
+                best_pos = pos
+        
+        return best_pos, best_score
+
+    def _push_stop(self, uid: int, floor: int) -> int:
+        """将楼层加入服务队列，返回新的队列位图"""
+        queue = self.service_queue[uid] | (1 << floor)
+        self.service_queue[uid] = queue
+        return queue
+
+    def _pop_stop(self, uid: int, floor: int) -> int:
+        """将楼层移出服务队列，返回新的队列位图"""
+        queue = self.service_queue[uid] & ~(1 << floor)
+        self.service_queue[uid] = queue
+        return queue
 
     def _assign_task(self, unit: ProxyElevator, target_floor: int):
         """分配任务"""
-        if target_floor not in self.service_queue[unit.id]:
-            self.service_queue[unit.id].append(target_floor)
+        self._push_stop(unit.id, target_floor)
         
-        if self.unit_state[unit.id] == "idle":
-            self.unit_state[unit.id] = "moving"
+        if self.unit_state[unit.id] == IDLE:
+            self.unit_state[unit.id] = MOVING
             self._execute_next(unit)
 
     def _execute_next(self, unit: ProxyElevator):
@@ -239,201 +408,151 @@ class IntelligentDispatchController(ElevatorController):
         queue = self.service_queue[unit.id]
         
         if not queue:
-            self.unit_state[unit.id] = "idle"
-            self.unit_heading[unit.id] = "none"
+            self.unit_state[unit.id] = IDLE
+            self.unit_heading[unit.id] = NONE
             return
         
+        # 队列位图本身就是精确的键，队列变化时自然失效，无需额外维护
         current = unit.current_floor
         heading = self.unit_heading[unit.id]
-        
-        # SCAN算法：继续当前方向直到没有目标，然后反向
-        if heading == "up" or heading == "none":
-            upper = [f for f in queue if f > current]
-            if upper:
-                next_floor = min(upper)
-                self.unit_heading[unit.id] = "up"
-            else:
-                lower = [f for f in queue if f < current]
-                next_floor = max(lower) if lower else queue[0]
-                self.unit_heading[unit.id] = "down" if lower else "none"
+        cached = self._next_cache.get(unit.id)
+        if cached is not None and cached[0] == queue and cached[1] == current and cached[2] == heading:
+            next_floor, new_heading = cached[3], cached[4]
         else:
-            lower = [f for f in queue if f < current]
-            if lower:
-                next_floor = max(lower)
-                self.unit_heading[unit.id] = "down"
-            else:
-                upper = [f for f in queue if f > current]
-                next_floor = min(upper) if upper else queue[0]
-                self.unit_heading[unit.id] = "up" if upper else "none"
+            next_floor, new_heading = _scan_next_floor(queue, current, heading)
+            self._next_cache[unit.id] = (queue, current, heading, next_floor, new_heading)
+        self.unit_heading[unit.id] = new_heading
         
         # 发送移动指令
         unit.go_to_floor(next_floor)
         
         if self.debug:
-            print(f"[算法] 电梯{unit.id + 1} → F{next_floor} ({self.unit_heading[unit.id]})")
+            print(f"[算法] 电梯{unit.id + 1} → F{next_floor} ({HEADING_NAMES[self.unit_heading[unit.id] + 1]})")
 
     def on_elevator_move(self, elevator: ProxyElevator, from_pos: float, to_pos: float,
                         direction: str, status: str) -> None:
-        """电梯移动 - 记录能耗"""
-        # 更新电梯状态
-        self.unit_state[elevator.id] = "moving"
-        self.unit_heading[elevator.id] = direction
-        
-        # 记录移动次数（用于能耗计算）
-        if int(from_pos) != int(to_pos):
-            self.move_count[elevator.id] += 1
-            
-            # 1-3号电梯能耗为1，4号电梯能耗为2
-            energy = 2 if elevator.id == 3 else 1
-            # 考虑负载对能耗的影响
-            passenger_count = len(elevator.passengers)
-            load_factor = min(1.0, passenger_count / self.unit_capacity)
-            energy *= (1 + load_factor * 0.3)  # 载客时能耗增加
-            
-            self.total_energy += energy
+        """电梯移动 - 更新状态，能耗在tick结束时统一统计"""
+        self.unit_state[elevator.id] = MOVING
+        self.unit_heading[elevator.id] = HEADING_CODES.get(direction, NONE)
 
     def on_elevator_stopped(self, elevator: ProxyElevator, floor: ProxyFloor) -> None:
         """电梯停靠 - 整合两版优点的智能决策"""
         current = elevator.current_floor
-        direction = elevator.last_tick_direction if hasattr(elevator, 'last_tick_direction') else Direction.UP
+        direction = elevator.last_tick_direction if self._has_last_direction else Direction.UP
         
-        # 更新请求队列：直接根据floor的队列状态设置
-        self.request_queue[current][0] = len(floor.up_queue) > 0
-        self.request_queue[current][1] = len(floor.down_queue) > 0
+        # 更新请求位图：直接根据floor的队列状态设置
+        bit = 1 << current
+        request_masks = self.request_masks
+        if floor.up_queue:
+            request_masks[UP_IDX] |= bit
+        else:
+            request_masks[UP_IDX] &= ~bit
+        if floor.down_queue:
+            request_masks[DOWN_IDX] |= bit
+        else:
+            request_masks[DOWN_IDX] &= ~bit
+        request_mask = request_masks[UP_IDX] | request_masks[DOWN_IDX]
         
         # 从服务队列中移除当前楼层
-        if current in self.service_queue[elevator.id]:
-            self.service_queue[elevator.id].remove(current)
-        
-        # 清除对应的呼叫
-        heading = self.unit_heading[elevator.id]
-        if heading in self.pending_calls:
-            self.pending_calls[heading].discard(current)
+        queue = self._pop_stop(elevator.id, current)
         
-        self.unit_state[elevator.id] = "loading"
+        self.unit_state[elevator.id] = LOADING
         
         if self.debug:
-            print(f"[算法] 电梯{elevator.id + 1} 停靠 @ F{floor.floor}")
+            print(f"[算法] 电梯{elevator.id + 1} 停靠 @ F{current}")
         
         # 空电梯特殊处理
         if len(elevator.passengers) == 0:
             up_count = len(floor.up_queue) if current < self.total_levels else 0
             down_count = len(floor.down_queue) if current > 0 else 0
             
-            # 优先根据当前方向处理请求
-            if direction == Direction.UP:
-                if up_count > 0:
-                    elevator.go_to_floor(current + 1)
-                    self.unit_heading[elevator.id] = "up"
-                    return
-                elif down_count > 0:
-                    elevator.go_to_floor(current - 1)
-                    self.unit_heading[elevator.id] = "down"
-                    return
-            elif direction == Direction.DOWN:
-                if down_count > 0:
-                    elevator.go_to_floor(current - 1)
-                    self.unit_heading[elevator.id] = "down"
-                    return
-                elif up_count > 0:
-                    elevator.go_to_floor(current + 1)
-                    self.unit_heading[elevator.id] = "up"
-                    return
-            
-            # 处理当前楼层剩余请求
+            # 优先根据当前方向处理请求，没有方向时按人数多的一侧
             if up_count > 0 or down_count > 0:
-                if up_count > down_count:
-                    elevator.go_to_floor(current + 1)
-                    self.unit_heading[elevator.id] = "up"
-                else:
-                    elevator.go_to_floor(current - 1)
-                    self.unit_heading[elevator.id] = "down"
+                step = _EMPTY_STOP_STEP.get((direction, up_count > 0, down_count > 0))
+                if step is None:
+                    step = UP if up_count > down_count else DOWN
+                elevator.go_to_floor(current + step)
+                self.unit_heading[elevator.id] = step
                 return
             
             # 寻找其他楼层的request
-            request_floors = [f for f in range(len(self.request_queue)) 
-                             if f != current and (self.request_queue[f][0] or self.request_queue[f][1])]
+            request_floors = _mask_floors(request_mask & ~bit)
             if request_floors:
                 # 结合距离和区域选择最优楼层
-                best_score = -1
-                best_floor = request_floors[0]
-                
-                for f in request_floors:
-                    distance = abs(f - current)
-                    zone_start, zone_end = self.zone_assignment[elevator.id]
-                    in_zone = 1 if zone_start <= f <= zone_end else 0.5
-                    score = (100 - distance * 2) * in_zone
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_floor = f
+                best_floor = _best_zone_floor(request_floors, current,
+                                              self._zone_lo[elevator.id], self._zone_hi[elevator.id])
                 
                 elevator.go_to_floor(best_floor)
                 if best_floor > current:
-                    self.unit_heading[elevator.id] = "up"
+                    self.unit_heading[elevator.id] = UP
                 else:
-                    self.unit_heading[elevator.id] = "down"
+                    self.unit_heading[elevator.id] = DOWN
                 return
         
         # 获取候选楼层 - 整合了两版算法的优点
         candidates = []
         
         # 1. 电梯内乘客目的地
+        # 一次遍历同时记录上方最近和下方最近的目的地，不生成临时列表
         my_goals = self.elevator_goals.get(elevator.id, {})
         if my_goals:
-            dests = [d for d in my_goals.values() if d != current]
+            min_above = None
+            max_below = None
+            for d in my_goals.values():
+                if d > current:
+                    if min_above is None or d < min_above:
+                        min_above = d
+                elif d < current:
+                    if max_below is None or d > max_below:
+                        max_below = d
             if direction == Direction.UP:
-                dests = [d for d in dests if d > current]
-                if dests:
-                    candidates.append(min(dests))
+                if min_above is not None:
+                    candidates.append(min_above)
             elif direction == Direction.DOWN:
-                dests = [d for d in dests if d < current]
-                if dests:
-                    candidates.append(max(dests))
+                if max_below is not None:
+                    candidates.append(max_below)
+        
+        # 2. 服务队列中的目标（位图中最近的上/下方楼层）
+        if queue:
+            if direction == Direction.UP:
+                nearest = _floor_above(queue, current)
+            elif direction == Direction.DOWN:
+                nearest = _floor_below(queue, current)
+            else:
+                nearest = None
+            if nearest is not None:
+                candidates.append(nearest)
         
-        # 2. 服务队列中的目标
-        if self.service_queue[elevator.id]:
+        # 3. 同方向request楼层（位图中最近的上/下方楼层）
+        if request_mask:
             if direction == Direction.UP:
-                upper = [f for f in self.service_queue[elevator.id] if f > current]
-                if upper:
-                    candidates.append(min(upper))
+                nearest = _floor_above(request_mask, current)
             elif direction == Direction.DOWN:
-                lower = [f for f in self.service_queue[elevator.id] if f < current]
-                if lower:
-                    candidates.append(max(lower))
-        
-        # 3. 同方向request楼层
-        request_floors = []
-        for f in range(len(self.request_queue)):
-            if self.request_queue[f][0] or self.request_queue[f][1]:
-                request_floors.append(f)
-        
-        if direction == Direction.UP:
-            above = [f for f in request_floors if f > current]
-            if above:
-                candidates.append(min(above))
-        elif direction == Direction.DOWN:
-            below = [f for f in request_floors if f < current]
-            if below:
-                candidates.append(max(below))
-        
-        # 选择最优目标
+                nearest = _floor_below(request_mask, current)
+            else:
+                nearest = None
+            if nearest is not None:
+                candidates.append(nearest)
+        
+        # 选择最优目标 - 一次遍历取距离最近者，同距离取较低楼层
         if candidates:
-            # 去重并根据距离排序
-            unique_candidates = list(set(candidates))
-            distances = [(abs(f - current), f) for f in unique_candidates]
-            distances.sort()
-            target_floor = distances[0][1]
+            target_floor = candidates[0]
+            best_distance = abs(target_floor - current)
+            for f in candidates:
+                distance = abs(f - current)
+                if distance < best_distance or (distance == best_distance and f < target_floor):
+                    best_distance = distance
+                    target_floor = f
             
             elevator.go_to_floor(target_floor)
             if target_floor > current:
-                self.unit_heading[elevator.id] = "up"
+                self.unit_heading[elevator.id] = UP
             else:
-                self.unit_heading[elevator.id] = "down"
+                self.unit_heading[elevator.id] = DOWN
         else:
             # 无任务时设置为空闲
-            self.unit_state[elevator.id] = "idle"
-            self.unit_heading[elevator.id] = "none"
+            self.unit_state[elevator.id] = IDLE
+            self.unit_heading[elevator.id] = NONE
 
     def on_passenger_board(self, elevator: ProxyElevator, passenger: ProxyPassenger) -> None:
         """乘客登梯 - 整合两版记录"""
@@ -442,8 +561,7 @@ class IntelligentDispatchController(ElevatorController):
         self.elevator_goals[elevator.id][passenger.id] = passenger.destination
         
         # 添加目的地到队列
-        if passenger.destination not in self.service_queue[elevator.id]:
-            self.service_queue[elevator.id].append(passenger.destination)
+        self._push_stop(elevator.id, passenger.destination)
         
         if self.debug:
             print(f"[算法] 乘客登梯{elevator.id + 1} → F{passenger.destination}")
@@ -453,7 +571,7 @@ class IntelligentDispatchController(ElevatorController):
         # 标记乘客完成
         if passenger.id in self.user_data:
             self.user_data[passenger.id]['completed'] = True
-            self.user_data[passenger.id]['completed_tick'] = self.tick if hasattr(self, 'tick') else 0
+            self.user_data[passenger.id]['completed_tick'] = self.tick
         
         # 移除乘客目的地记录
         if passenger.id in self.passenger_registry[elevator.id]:
@@ -463,63 +581,59 @@ class IntelligentDispatchController(ElevatorController):
             del self.elevator_goals[elevator.id][passenger.id]
         
         # 如果到达目的地，从服务队列中移除
-        if floor.floor in self.service_queue[elevator.id]:
-            self.service_queue[elevator.id].remove(floor.floor)
+        self._pop_stop(elevator.id, floor.floor)
 
     def on_elevator_idle(self, elevator: ProxyElevator) -> None:
         """电梯空闲 - 智能处理"""
         current = elevator.current_floor
         
         # 清空服务队列
-        self.service_queue[elevator.id].clear()
-        self.unit_state[elevator.id] = "idle"
+        self.service_queue[elevator.id] = 0
+        self.unit_state[elevator.id] = IDLE
+        
+        # 没有任何请求时直接返回区域中心
+        up_mask, down_mask = self.request_masks
+        if not (up_mask or down_mask):
+            self._return_to_zone_center(elevator, current)
+            return
         
         # 如果当前楼层有request，优先处理
-        if self.request_queue[current][0] and current < self.total_levels:  # up
+        bit = 1 << current
+        if up_mask & bit and current < self.total_levels:  # up
             elevator.go_to_floor(current + 1)
-            self.unit_heading[elevator.id] = "up"
-            self.unit_state[elevator.id] = "moving"
+            self.unit_heading[elevator.id] = UP
+            self.unit_state[elevator.id] = MOVING
             return
-        elif self.request_queue[current][1] and current > 0:  # down
+        elif down_mask & bit and current > 0:  # down
             elevator.go_to_floor(current - 1)
-            self.unit_heading[elevator.id] = "down"
-            self.unit_state[elevator.id] = "moving"
+            self.unit_heading[elevator.id] = DOWN
+            self.unit_state[elevator.id] = MOVING
             return
         
         # 寻找其他楼层的request
-        waiting = []
-        for f in range(len(self.request_queue)):
-            if f != current and (self.request_queue[f][0] or self.request_queue[f][1]):
-                waiting.append(f)
+        waiting = _mask_floors((up_mask | down_mask) & ~bit)
         
         if waiting:
             # 结合距离和区域选择最优楼层
-            best_score = -1
-            best_floor = waiting[0]
-            
-            for f in waiting:
-                distance = abs(f - current)
-                zone_start, zone_end = self.zone_assignment[elevator.id]
-                in_zone = 1 if zone_start <= f <= zone_end else 0.5
-                score = (100 - distance * 2) * in_zone
-                
-                if score > best_score:
-                    best_score = score
-                    best_floor = f
+            best_floor = _best_zone_floor(waiting, current,
+                                          self._zone_lo[elevator.id], self._zone_hi[elevator.id])
             
             elevator.go_to_floor(best_floor)
-            self.unit_heading[elevator.id] = "up" if best_floor > current else "down"
-            self.unit_state[elevator.id] = "moving"
+            self.unit_heading[elevator.id] = UP if best_floor > current else DOWN
+            self.unit_state[elevator.id] = MOVING
         else:
-            # 无请求时，返回区域中心
-            zone_start, zone_end = self.zone_assignment[elevator.id]
-            zone_center = (zone_start + zone_end) // 2
-            if abs(current - zone_center) > 2:  # 只有距离大于2层时才返回
-                elevator.go_to_floor(zone_center)
-                self.unit_heading[elevator.id] = "up" if zone_center > current else "down"
-                self.unit_state[elevator.id] = "moving"
-            else:
-                self.unit_heading[elevator.id] = "none"
+            self._return_to_zone_center(elevator, current)
+
+    def _return_to_zone_center(self, elevator: ProxyElevator, current: int):
+        """无请求时，返回区域中心 - 只有距离大于2层时才返回"""
+        zone_center = self._zone_center[elevator.id]
+        distance = current - zone_center
+        if distance > 2 or distance < -2:
+            elevator.go_to_floor(zone_center)
+            self.unit_heading[elevator.id] = UP if zone_center > current else DOWN
+            self.unit_state[elevator.id] = MOVING
+        else:
+            self.unit_heading[elevator.id] = NONE
 
     def on_elevator_passing_floor(self, elevator: ProxyElevator, floor: ProxyFloor, direction: str) -> None:
         """经过楼层 - 可扩展接口"""
@@ -530,16 +644,37 @@ class IntelligentDispatchController(ElevatorController):
         pass
 
     def on_event_execute_end(self, tick, events, elevators, floors):
-        """事件执行结束 - 记录时间戳"""
+        """事件执行结束 - 批量派梯、统计能耗并记录时间戳"""
+        if self._call_batch:
+            self._dispatch_batch()
+        self._account_moves(elevators)
         self.tick = tick
 
+    def _account_moves(self, elevators: List[ProxyElevator]):
+        """按本tick各电梯跨越的楼层数累计移动次数和能耗，不参与调度决策"""
+        last_floor = self._last_floor
+        capacity = self.unit_capacity
+        for elevator in elevators:
+            uid = elevator.id
+            cur = elevator.current_floor
+            moved = cur - last_floor[uid]
+            if not moved:
+                continue
+            if moved < 0:
+                moved = -moved
+            last_floor[uid] = cur
+            self.move_count[uid] += moved
+            # 考虑负载对能耗的影响，载客时能耗增加
+            load_factor = min(1.0, len(elevator.passengers) / capacity)
+            self.total_energy += self.energy_cost[uid] * (1 + load_factor * 0.3) * moved
+
     def on_stop(self):
         """停止时输出统计信息"""
         if self.debug:
             print("\n[算法] 调度算法停止，统计信息:")
             print(f"  总能耗: {self.total_energy:.2f}")
             print("  电梯移动次数:")
-            for elevator_id, count in sorted(self.move_count.items()):
+            for elevator_id, count in enumerate(self.move_count):
                 print(f"    电梯{elevator_id + 1}: {count}次")
             # 计算完成率
             total_passengers = len(self.user_data)
@@ -7,6 +7,7 @@
 import sys
 import os
 import time
+from collections import deque
 from datetime import datetime
 from typing import List, Dict, Set, Optional
 
@@ -81,7 +82,7 @@ class GUIOnlyController(ElevatorController):
             
             # 实时指标
             'current_throughput': 0,  # 最近一分钟内服务的乘客数
-            'wait_times_last_minute': [],
+            'wait_times_last_minute': deque(),  # 按时间先后追加，过期的从左端弹出
         }
         
         # 增强的电梯状态跟踪
@@ -113,7 +114,9 @@ class GUIOnlyController(ElevatorController):
                 'down_calls': 0,
                 'passengers_served': 0,
                 'avg_wait_time': 0,
-                'wait_times': []
+                # 只保留累计值，平均等待时间增量更新
+                'total_wait_time': 0,
+                'wait_count': 0
             }
             self.traffic_analysis['calls_by_floor'][floor.floor] = 0
         
@@ -239,7 +242,7 @@ class GUIOnlyController(ElevatorController):
         
         # 更新当前吞吐量
         current_time = time.time()
-        self.stats['wait_times_last_minute'] = [wt for wt in self.stats['wait_times_last_minute'] if current_time - wt < 60]
+        self._prune_recent_pickups(current_time)
         
         # 计算等待时间（如果有时间戳信息）
         if hasattr(passenger, 'call_time') and hasattr(passenger, 'board_time'):
@@ -252,8 +255,10 @@ class GUIOnlyController(ElevatorController):
             
             # 更新楼层等待时间统计
             if hasattr(passenger, 'origin_floor') and passenger.origin_floor in self.floor_stats:
-                self.floor_stats[passenger.origin_floor]['wait_times'].append(wait_time)
-                self.floor_stats[passenger.origin_floor]['avg_wait_time'] = sum(self.floor_stats[passenger.origin_floor]['wait_times']) / len(self.floor_stats[passenger.origin_floor]['wait_times'])
+                origin_stats = self.floor_stats[passenger.origin_floor]
+                origin_stats['total_wait_time'] += wait_time
+                origin_stats['wait_count'] += 1
+                origin_stats['avg_wait_time'] = origin_stats['total_wait_time'] / origin_stats['wait_count']
         
         # 更新电梯统计
         if elevator.id in self.elevator_details:
@@ -455,6 +460,8 @@ class GUIOnlyController(ElevatorController):
                 'traffic_analysis': self.traffic_analysis,
                 'elevator_performance': {}
             }
+            # 最近一分钟的记录由模拟线程原地修改，不能跨线程传引用，只发送条数
+            stats_package['wait_times_last_minute'] = len(self.stats['wait_times_last_minute'])
             
             # 添加每台电梯的性能数据
             for elevator_id, details in self.elevator_details.items():
@@ -505,9 +512,14 @@ class GUIOnlyController(ElevatorController):
     def _update_realtime_metrics(self):
         """更新实时性能指标"""
         # 计算最近一分钟的吞吐量
-        current_time = time.time()
-        recent_pickups = len([t for t in self.stats['wait_times_last_minute'] if current_time - t < 60])
-        self.stats['current_throughput'] = recent_pickups
+        self._prune_recent_pickups(time.time())
+        self.stats['current_throughput'] = len(self.stats['wait_times_last_minute'])
+
+    def _prune_recent_pickups(self, current_time: float):
+        """移除一分钟以前的登梯时间戳（时间戳按先后追加，只需检查左端）"""
+        recent = self.stats['wait_times_last_minute']
+        while recent and current_time - recent[0] >= 60:
+            recent.popleft()
     
     def _update_traffic_analysis(self):
         """更新交通流量分析"""
@@ -2,14 +2,27 @@
 """
 电梯可视化后端服务
 作用：接收电梯模拟器的数据，提供给前端展示
+
+生产环境建议使用多线程WSGI服务器运行（在old目录下）：
+    gunicorn -w 1 -k gthread --threads 8 elevator_backend_flask:app
+状态保存在进程内存中，worker数需保持为1，并发由线程提供
+
+可选：设置环境变量 ELEVATOR_UDS_PATH 后，额外在该路径监听Unix域套接字，
+接收 4字节小端长度 + JSON 的状态帧（与 /api/update 的请求体相同），省去HTTP开销
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, request
 from flask_cors import CORS
-from threading import Lock
+from threading import Lock, Event, Thread
 from datetime import datetime
 import json
 import os
+import socket
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时退回标准库json
+    orjson = None
 
 # 结果文件路径：脚本目录（兼容本地）和仓库根（兼容评测环境）
 RESULT_FILE = os.path.join(os.path.dirname(__file__), "result.json")
@@ -28,76 +41,187 @@ elevator_state = {
     "timestamp": datetime.now().isoformat()
 }
 
+# 只用于串行化写入方；读取方直接读取整体替换的快照，不需要加锁
 state_lock = Lock()
 
-def _write_result_file(state: dict) -> None:
-    """将当前状态以 JSON 原子性写入 result.json（写入脚本目录和仓库根）"""
+
+def _dumps(obj) -> bytes:
+    """序列化为JSON字节串，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes):
+    """反序列化JSON字节串，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def fast_jsonify(obj):
+    """jsonify的替代，跳过Flask默认的json序列化流程"""
+    return app.response_class(_dumps(obj), mimetype="application/json")
+
+
+# 当前状态的序列化结果，只在状态变化时更新，GET时直接返回
+_cached_state_bytes = _dumps(elevator_state)
+
+def _write_result_file(data: bytes) -> None:
+    """将已序列化的状态原子性写入 result.json（写入脚本目录和仓库根）"""
     try:
         for path in (RESULT_FILE, REPO_RESULT_FILE):
             # 确保目录存在
             os.makedirs(os.path.dirname(path), exist_ok=True)
             tmp_path = path + ".tmp"
-            with open(tmp_path, "w", encoding="utf-8") as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
             # 原子替换
             os.replace(tmp_path, path)
     except Exception:
         # 写入失败不影响主流程
         pass
 
-# 启动时写一次初始状态，避免评测在读取时找不到文件
-_write_result_file(elevator_state)
+
+# 后台写文件：请求线程只登记最新状态，写入线程合并中间的更新，只写最后一次
+_pending_result = None
+_result_event = Event()
+
+
+def _result_writer() -> None:
+    """结果文件写入线程"""
+    while True:
+        _result_event.wait()
+        _result_event.clear()
+        data = _pending_result
+        if data is not None:
+            _write_result_file(data)
+
+
+def _schedule_result_write(data: bytes) -> None:
+    """登记待写入的状态并唤醒写入线程，立即返回"""
+    global _pending_result
+    _pending_result = data
+    _result_event.set()
+
+
+# 启动时同步写一次初始状态，避免评测在读取时找不到文件
+_write_result_file(_cached_state_bytes)
+Thread(target=_result_writer, name="result-writer", daemon=True).start()
 
 @app.route('/api/state', methods=['GET'])
 def get_state():
     """获取当前电梯状态（前端用这个接口获取数据）"""
+    return app.response_class(_cached_state_bytes, mimetype="application/json")
+
+def _apply_update(data: dict) -> None:
+    """用上报的数据更新当前状态（HTTP和Unix域套接字共用）"""
+    global elevator_state, _cached_state_bytes
+    
+    # 在锁外构造新状态并序列化，锁内只做引用替换
+    new_state = {
+        "tick": data.get("tick", 0),
+        "elevators": data.get("elevators", []),
+        "events": data.get("events", []),
+        "passengers": data.get("passengers", []),
+        "max_floor": data.get("max_floor", 5),
+    }
+    
+    # 内容与当前状态相同（重复推送）时，跳过序列化和写文件
+    current = elevator_state
+    if all(current.get(key) == value for key, value in new_state.items()):
+        return
+    
+    # 每次更新只取一次时间戳，在锁外完成格式化
+    new_state["timestamp"] = datetime.now().isoformat()
+    new_bytes = _dumps(new_state)
+    
     with state_lock:
-        return jsonify(elevator_state)
+        elevator_state = new_state
+        _cached_state_bytes = new_bytes
+        # 交给后台线程写入结果文件（同时写到脚本目录和仓库根）
+        _schedule_result_write(new_bytes)
+
 
 @app.route('/api/update', methods=['POST'])
 def update_state():
     """更新电梯状态（bus_example.py 会调用这个接口）"""
-    global elevator_state
-    
-    data = request.get_json()
-    
-    with state_lock:
-        elevator_state = {
-            "tick": data.get("tick", 0),
-            "elevators": data.get("elevators", []),
-            "events": data.get("events", []),
-            "passengers": data.get("passengers", []),
-            "max_floor": data.get("max_floor", 5),
-            "timestamp": datetime.now().isoformat()
-        }
-        # 写入结果文件（同时写到脚本目录和仓库根）
-        _write_result_file(elevator_state)
-    
-    return jsonify({"status": "ok", "message": "State updated"})
+    _apply_update(request.get_json())
+    return fast_jsonify({"status": "ok", "message": "State updated"})
+
+def _recv_exact(conn: socket.socket, size: int):
+    """读取恰好size字节，连接关闭时返回None"""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = conn.recv(size - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def _uds_client(conn: socket.socket) -> None:
+    """处理一个Unix域套接字连接上的连续状态帧"""
+    with conn:
+        while True:
+            header = _recv_exact(conn, 4)
+            if header is None:
+                return
+            body = _recv_exact(conn, int.from_bytes(header, "little"))
+            if body is None:
+                return
+            try:
+                _apply_update(_loads(body))
+            except Exception:
+                # 单帧解析失败不影响后续帧
+                pass
+
+
+def _uds_server(path: str) -> None:
+    """Unix域套接字监听线程"""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(4)
+    while True:
+        conn, _ = server.accept()
+        Thread(target=_uds_client, args=(conn,), daemon=True).start()
+
+
+UDS_PATH = os.environ.get("ELEVATOR_UDS_PATH")
+if UDS_PATH and hasattr(socket, "AF_UNIX"):
+    Thread(target=_uds_server, args=(UDS_PATH,), name="uds-server", daemon=True).start()
 
 @app.route('/api/reset', methods=['POST'])
 def reset_state():
     """重置所有状态"""
-    global elevator_state
+    global elevator_state, _cached_state_bytes
+    
+    timestamp = datetime.now().isoformat()
+    
+    new_state = {
+        "tick": 0,
+        "elevators": [],
+        "events": [],
+        "passengers": [],
+        "max_floor": 5,
+        "timestamp": timestamp
+    }
+    new_bytes = _dumps(new_state)
     
     with state_lock:
-        elevator_state = {
-            "tick": 0,
-            "elevators": [],
-            "events": [],
-            "passengers": [],
-            "max_floor": 5,
-            "timestamp": datetime.now().isoformat()
-        }
-        # 写入结果文件（重置后的空状态）
-        _write_result_file(elevator_state)
+        elevator_state = new_state
+        _cached_state_bytes = new_bytes
+        # 交给后台线程写入结果文件（重置后的空状态）
+        _schedule_result_write(new_bytes)
     
-    return jsonify({"status": "ok", "message": "State reset"})
+    return fast_jsonify({"status": "ok", "message": "State reset"})
 
 @app.route('/health', methods=['GET'])
 def health():
-    """健康检查"""
-    return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
+    """健康检查，时间戳为最近一次状态更新的时间"""
+    return fast_jsonify({"status": "healthy", "timestamp": elevator_state["timestamp"]})
 
 
 if __name__ == '__main__':
@@ -108,5 +232,6 @@ if __name__ == '__main__':
     print("📊 获取状态: GET http://127.0.0.1:5000/api/state")
     print("📤 更新状态: POST http://127.0.0.1:5000/api/update")
     print("🔄 重置状态: POST http://127.0.0.1:5000/api/reset")
+    print("💡 生产环境: gunicorn -w 1 -k gthread --threads 8 elevator_backend_flask:app")
     print("=" * 60)
     app.run(debug=False, port=5000, host='127.0.0.1')
@@ -5,13 +5,47 @@
 运送结束后立即停在当前楼层进入休息状态，优先响应新请求
 智能响应逻辑：优先顺路工作电梯（包括有载电梯），其次休息电梯
 """
-from typing import Dict, List, Set
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时退回标准库json
+    orjson = None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:  # 未安装requests时只能使用Unix域套接字上报（或不上报）
+    requests = None
 
 from elevator_saga.client.base_controller import ElevatorController
 from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
 from elevator_saga.core.models import Direction, SimulationEvent
 
 
+def _dumps(obj) -> bytes:
+    """序列化为JSON字节串，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _mask_floors(mask: int) -> List[int]:
+    """将楼层位掩码展开为升序楼层列表"""
+    floors = []
+    while mask:
+        low = mask & -mask
+        floors.append(low.bit_length() - 1)
+        mask ^= low
+    return floors
+
+
 class OptimizedScanController(ElevatorController):
     """
     优化的SCAN电梯调度算法 - 智能响应版
@@ -22,60 +56,160 @@ class OptimizedScanController(ElevatorController):
     def __init__(self, server_url: str = "http://127.0.0.1:8000", debug: bool = False):
         """初始化控制器"""
         super().__init__(server_url, debug)
-        self.elevator_directions: Dict[int, str] = {}  # 记录每个电梯的当前方向
-        self.elevator_target_floors: Dict[int, Set[int]] = {}  # 记录每个电梯的目标楼层集合
-        self.passenger_destinations: Dict[int, Dict[int, int]] = {}  # 记录乘客目的地
+        # 以下按电梯在列表中的下标存放（并行列表），用 _id_to_idx 由电梯编号换算下标
+        self._id_to_idx: Dict[int, int] = {}
+        self.elevator_directions: List[str] = []  # 记录每个电梯的当前方向
+        self.elevator_target_floors: List[int] = []  # 记录每个电梯的目标楼层（位掩码，第f位表示楼层f）
+        self.passenger_destinations: List[Dict[int, int]] = []  # 记录乘客目的地
         self.max_floor = 0  # 最大楼层数
-        self.floor_requests: Dict[str, Set[int]] = {"up": set(), "down": set()}  # 记录各方向的楼层请求
+        self.floor_requests: Dict[str, int] = {"up": 0, "down": 0}  # 记录各方向的楼层请求（位掩码）
         self.elevator_resting_floors: Dict[int, int] = {}  # 记录电梯的休息楼层（初始位置）
-        self.elevator_states: Dict[int, str] = {}  # 记录电梯状态: 'resting', 'scanning'
+        self.elevator_states: List[str] = []  # 记录电梯状态: 'resting', 'scanning'
         
         # 新增：与前端交互和运行时状态（不改变现有调度逻辑）
         self.elevators: List[ProxyElevator] = []
-        self.all_passengers: List[ProxyPassenger] = []  # 用于可视化/诊断
+        self.all_passengers: Deque[ProxyPassenger] = deque(maxlen=50)  # 最近50位乘客，用于可视化/诊断
+        # 与all_passengers对应的上报记录：起止楼层不会变化，呼叫时生成一次，之后每帧直接复用
+        self._passenger_recs: Deque[dict] = deque(maxlen=50)
         self.current_tick: int = 0
         self.events_log = []
+        self._evt_types: List[str] = []  # 与events_log一一对应的事件类型字符串
+        # 上报用的最近10个事件，跨tick累积，未及时发出的tick的事件也会出现在之后的帧中
+        self._recent_events: Deque[dict] = deque(maxlen=10)
+        # 上报用的双缓冲快照：调度线程写入后台缓冲后在锁内切换 _live，发送线程只读取已提交的 _live
+        self._snap_a: dict = {}
+        self._snap_b: dict = {}
+        self._live: dict = self._snap_a
+        self._snap_lock = threading.Lock()
+        self._snap_ready = threading.Event()
         self.backend_url = "http://127.0.0.1:5000"
-        self.backend_available = self._check_backend()
-
-    def _check_backend(self) -> bool:
-        """检查可视化后端可用性（保持轻量，不影响主逻辑）"""
+        self._session = self._create_session()  # 复用连接，避免每个tick重新建立TCP连接
+        self._post = self._session.post if self._session is not None else None
+        # 可选：设置 ELEVATOR_UDS_PATH 后优先通过Unix域套接字上报，失败时退回HTTP
+        self.uds_path = os.environ.get("ELEVATOR_UDS_PATH") if hasattr(socket, "AF_UNIX") else None
+        self._uds = None
+        # 后端可用性：None表示未知；上报失败后置为False，冷却期内发送线程暂停发送
+        self.backend_available = None
+        self._backend_retry_ts = 0.0
+        self._backend_retry_interval = 5.0
+        # 上报在后台线程中进行，调度线程每个tick都提交快照；发送线程总是发送最新提交的一帧
+        # 上报节流由发送线程负责：两次上报至少间隔 _post_min_interval 秒，期间提交的帧只发最后一帧
+        self._post_min_interval = 0.05
+        self._last_elevator_rows: tuple = ()  # 上次上报时各电梯的(楼层, 目标, 乘客数, 方向)
+        if self._session is not None or self.uds_path:
+            threading.Thread(target=self._tx_loop, name="backend-tx", daemon=True).start()
+
+    def _create_session(self):
+        """创建保持长连接的HTTP会话，requests不可用时返回None"""
+        if requests is None:
+            return None
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        return session
+
+    def _tx_loop(self) -> None:
+        """后台上报线程：发送最新提交的快照，并根据结果更新 backend_available"""
+        headers = {"Content-Type": "application/json"}
+        last_sent = 0.0
+        while True:
+            self._snap_ready.wait()
+            # 节流和失败冷却都在这里等待；等待期间提交的新帧会替换 _live，醒来后发送的总是最新一帧
+            now = time.monotonic()
+            delay = max(last_sent + self._post_min_interval, self._backend_retry_ts) - now
+            if delay > 0:
+                time.sleep(delay)
+            self._snap_ready.clear()
+            last_sent = time.monotonic()
+            # 在锁内序列化，保证调度线程切换缓冲时不会读到半写的帧
+            with self._snap_lock:
+                body = _dumps(self._live)
+            if self.uds_path and self._send_uds(body):
+                self.backend_available = True
+                continue
+            try:
+                resp = self._post(f"{self.backend_url}/api/update", data=body, headers=headers, timeout=1)
+                self.backend_available = (resp.status_code == 200)
+            except Exception:
+                # 上报失败（或没有可用的HTTP会话）：标记为不可用并进入冷却期，但不抛异常（保持主流程运行）
+                self.backend_available = False
+                self._backend_retry_ts = time.monotonic() + self._backend_retry_interval
+
+    def _send_uds(self, body: bytes) -> bool:
+        """通过Unix域套接字发送一帧（4字节小端长度 + JSON），失败时关闭连接并返回False"""
+        sock = self._uds
         try:
-            import requests
-            resp = requests.get(f"{self.backend_url}/health", timeout=1)
-            return resp.status_code == 200
-        except Exception:
+            if sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(1)
+                sock.connect(self.uds_path)
+                self._uds = sock
+            sock.sendall(len(body).to_bytes(4, "little") + body)
+            return True
+        except OSError:
+            if sock is not None:
+                sock.close()
+            self._uds = None
             return False
 
+    @staticmethod
+    def _new_snapshot(elevators: List[ProxyElevator]) -> dict:
+        """创建一份上报快照，每台电梯的id/capacity固定不变"""
+        return {
+            "tick": 0,
+            "elevators": [
+                {"id": e.id, "current_floor": 0.0, "target_floor": 0, "passengers": 0, "direction": "", "capacity": 8}
+                for e in elevators
+            ],
+            "events": [],
+            "passengers": [],
+            "max_floor": 0,
+        }
+
     def _send_state_to_backend(self, elevators: List[ProxyElevator]) -> None:
-        """向可视化后端发送当前状态（容错：每次尝试并根据结果更新 backend_available）"""
+        """将当前状态写入后台缓冲并提交给发送线程，不等待网络"""
+        if self._session is None and not self.uds_path:
+            return
         try:
-            import requests
-            elevator_data = []
-            for e in elevators:
-                elevator_data.append({
-                    "id": e.id,
-                    "current_floor": round(e.current_floor_float, 1),
-                    "target_floor": e.target_floor,
-                    "passengers": len(e.passengers),
-                    "direction": e.target_floor_direction.value,
-                    "capacity": 8
-                })
-            events_data = [{"type": ev.type.value, "desc": str(ev)} for ev in self.events_log[-10:]]
-            passengers_data = [{"id": p.id, "origin": p.origin, "destination": p.destination} for p in self.all_passengers[-50:]]
-            payload = {
-                "tick": self.current_tick,
-                "elevators": elevator_data,
-                "events": events_data,
-                "passengers": passengers_data,
-                "max_floor": self.max_floor
-            }
-            resp = requests.post(f"{self.backend_url}/api/update", json=payload, timeout=1)
-            # 根据响应更新可用性标志，便于后续快速判断
-            self.backend_available = (resp.status_code == 200)
+            # 本tick的事件先并入最近事件（每tick最多取最后10个，按下标访问，不切片复制两个列表）
+            events_log = self.events_log
+            if events_log:
+                evt_types = self._evt_types
+                count = len(events_log)
+                self._recent_events.extend({"type": evt_types[i], "desc": str(events_log[i])}
+                                           for i in range(max(0, count - 10), count))
+            
+            elevator_rows = tuple(
+                (round(e.current_floor_float, 1), e.target_floor, len(e.passengers), e.target_floor_direction.value)
+                for e in elevators
+            )
+            # 本tick没有事件且电梯状态与上次提交的相同时，不再提交
+            if not events_log and elevator_rows == self._last_elevator_rows:
+                return
+            self._last_elevator_rows = elevator_rows
+            
+            # 写入当前未提交的缓冲，复用其中每台电梯的状态字典，只更新会变化的字段
+            back = self._snap_b if self._live is self._snap_a else self._snap_a
+            for tmpl, (current_floor, target_floor, passenger_count, direction) in zip(back["elevators"], elevator_rows):
+                tmpl["current_floor"] = current_floor
+                tmpl["target_floor"] = target_floor
+                tmpl["passengers"] = passenger_count
+                tmpl["direction"] = direction
+            back["tick"] = self.current_tick
+            # 快照的外层字典和列表都是复用的，列表原地清空后重新填充
+            events_data = back["events"]
+            events_data.clear()
+            events_data.extend(self._recent_events)
+            passengers_data = back["passengers"]
+            passengers_data.clear()
+            passengers_data.extend(self._passenger_recs)
+            back["max_floor"] = self.max_floor
+            # 提交：锁内只做引用切换
+            with self._snap_lock:
+                self._live = back
+            self._snap_ready.set()
         except Exception:
-            # 上报失败：标记为不可用，但不抛异常（保持主流程运行）
-            self.backend_available = False
+            # 构造状态失败不影响主流程
+            pass
 
     def on_init(self, elevators: List[ProxyElevator], floors: List[ProxyFloor]) -> None:
         """初始化优化的SCAN电梯算法"""
@@ -87,11 +221,13 @@ class OptimizedScanController(ElevatorController):
         self.max_floor = len(floors) - 1
         
         # 初始化每个电梯的状态
+        count = len(elevators)
+        self._id_to_idx = {elevator.id: i for i, elevator in enumerate(elevators)}
+        self.elevator_directions = ["up"] * count  # 初始方向向上
+        self.elevator_target_floors = [0] * count
+        self.passenger_destinations = [{} for _ in range(count)]
+        self.elevator_states = ['resting'] * count  # 初始状态为休息
         for i, elevator in enumerate(elevators):
-            self.elevator_directions[elevator.id] = "up"  # 初始方向向上
-            self.elevator_target_floors[elevator.id] = set()
-            self.passenger_destinations[elevator.id] = {}
-            self.elevator_states[elevator.id] = 'resting'  # 初始状态为休息
             
             # 计算初始休息楼层 - 将电梯均匀分布在楼层上
             self.elevator_resting_floors[elevator.id] = self._calculate_resting_floor(i, len(elevators))
@@ -102,6 +238,9 @@ class OptimizedScanController(ElevatorController):
 
         # 保持对电梯列表的引用，供调度/唤醒使用
         self.elevators = elevators
+        self._snap_a = self._new_snapshot(elevators)
+        self._snap_b = self._new_snapshot(elevators)
+        self._live = self._snap_a
 
     def _calculate_resting_floor(self, elevator_index: int, total_elevators: int) -> int:
         """计算电梯的初始休息楼层，确保均匀分布"""
@@ -120,19 +259,29 @@ class OptimizedScanController(ElevatorController):
         self.current_tick = tick
         self.events_log = events
         self.elevators = elevators
+        # 事件类型只取一次，调试日志和上报共用
+        event_types = [e.type.value for e in events] if events else []
+        self._evt_types = event_types
+        
+        if not self.debug:
+            return
         
         if events:
-            event_types = [e.type.value for e in events]
             if any(event in event_types for event in ['passenger_call', 'elevator_idle', 'elevator_stopped']):
                 print(f"Tick {tick}: 处理 {len(events)} 个事件 {event_types}")
         
-        # 显示电梯状态（保持原有输出格式，前端可能解析）
-        for elevator in elevators:
-            passenger_count = len(elevator.passengers)
-            direction = self.elevator_directions.get(elevator.id, "up")
-            state = self.elevator_states.get(elevator.id, "resting")
-            target_info = f"目标:{list(self.elevator_target_floors.get(elevator.id, set()))}" if self.elevator_target_floors.get(elevator.id) else "无目标"
-            print(f"   E{elevator.id}[{direction}|{state}] 在 F{elevator.current_floor} {target_info} 乘客:{passenger_count}")
+        # 显示电梯状态（保持原有输出格式）
+        elevator_directions = self.elevator_directions
+        elevator_states = self.elevator_states
+        elevator_target_floors = self.elevator_target_floors
+        for idx, elevator in enumerate(elevators):
+            elevator_id = elevator.id
+            direction = elevator_directions[idx]
+            state = elevator_states[idx]
+            targets = elevator_target_floors[idx]
+            target_info = f"目标:{_mask_floors(targets)}" if targets else "无目标"
+            print(f"   E{elevator_id}[{direction}|{state}] 在 F{elevator.current_floor} {target_info} "
+                  f"乘客:{len(elevator.passengers)}")
 
     def on_event_execute_end(
         self, tick: int, events: List[SimulationEvent], elevators: List[ProxyElevator], floors: List[ProxyFloor]
@@ -149,14 +298,19 @@ class OptimizedScanController(ElevatorController):
         乘客呼叫时的回调
         记录楼层请求，智能选择电梯响应
         """
-        # 保留原有输出
-        print(f" 乘客 {passenger.id} 在 F{floor.floor} 请求 {direction} 方向")
-        self.floor_requests[direction].add(floor.floor)
-        print(f"   当前请求 - 上行: {sorted(self.floor_requests['up'])}, 下行: {sorted(self.floor_requests['down'])}")
+        floor_requests = self.floor_requests
+        floor_requests[direction] |= 1 << floor.floor
+        # 逐事件输出只在调试时进行
+        if self.debug:
+            print(f" 乘客 {passenger.id} 在 F{floor.floor} 请求 {direction} 方向")
+            print(f"   当前请求 - 上行: {_mask_floors(floor_requests['up'])}, 下行: {_mask_floors(floor_requests['down'])}")
         
         # 记录乘客（供可视化/诊断使用）
         try:
             self.all_passengers.append(passenger)
+            self._passenger_recs.append(
+                {"id": passenger.id, "origin": passenger.origin, "destination": passenger.destination}
+            )
         except Exception:
             # 兼容性保护，不阻塞主逻辑
             pass
@@ -172,27 +326,32 @@ class OptimizedScanController(ElevatorController):
         working_candidate = self._find_working_elevator_candidate(request_floor, direction)
         if working_candidate:
             benefit, elevator_id, elevator, passenger_count = working_candidate
-            load_info = "空载" if passenger_count == 0 else f"有载({passenger_count}人)"
-            print(f"   智能响应: E{elevator_id} {load_info} 顺路响应 F{request_floor} 的请求 (节省距离: {benefit}层)")
+            if self.debug:
+                load_info = "空载" if passenger_count == 0 else f"有载({passenger_count}人)"
+                print(f"   智能响应: E{elevator_id} {load_info} 顺路响应 F{request_floor} 的请求 (节省距离: {benefit}层)")
             self._redirect_elevator(elevator, request_floor, direction)
             return
         
-        # 没有顺路工作电梯时，寻找休息电梯
-        resting_elevators = []
-        for elevator in self.elevators:
-            if self.elevator_states[elevator.id] == 'resting':
+        # 没有顺路工作电梯时，单次遍历找最近的休息电梯（距离相同时取靠前的电梯）
+        elevator_states = self.elevator_states
+        closest_elevator = None
+        closest_distance = 0
+        for idx, elevator in enumerate(self.elevators):
+            if elevator_states[idx] == 'resting':
                 distance = abs(elevator.current_floor - request_floor)
-                resting_elevators.append((distance, elevator.id, elevator))
+                if closest_elevator is None or distance < closest_distance:
+                    closest_elevator = elevator
+                    closest_distance = distance
         
-        if resting_elevators:
-            # 使用最近的休息电梯
-            resting_elevators.sort(key=lambda x: x[0])
-            closest_distance, closest_id, closest_elevator = resting_elevators[0]
-            print(f"    唤醒休息电梯 E{closest_id} 处理 F{request_floor} 的请求 (距离: {closest_distance}层)")
+        if closest_elevator is not None:
+            closest_id = closest_elevator.id
+            if self.debug:
+                print(f"    唤醒休息电梯 E{closest_id} 处理 F{request_floor} 的请求 (距离: {closest_distance}层)")
             self._wake_up_elevator(closest_elevator, request_floor, direction)
             return
         
-        print(f"   无合适电梯可用，等待扫描中的电梯自然处理请求")
+        if self.debug:
+            print("   无合适电梯可用，等待扫描中的电梯自然处理请求")
 
     def _find_working_elevator_candidate(self, request_floor: int, direction: str):
         """
@@ -200,99 +359,87 @@ class OptimizedScanController(ElevatorController):
         """
         best_candidate = None
         best_benefit = 0
+        # 循环内反复用到的列表先取到局部变量
+        elevator_states = self.elevator_states
+        elevator_directions = self.elevator_directions
+        elevator_target_floors = self.elevator_target_floors
         
-        for elevator in self.elevators:
-            elevator_id = elevator.id
-            
+        for idx, elevator in enumerate(self.elevators):
             # 只考虑工作中的电梯（不限制是否空载）
-            if self.elevator_states[elevator_id] != 'scanning':
+            if elevator_states[idx] != 'scanning':
                 continue
             
-            current_floor = elevator.current_floor
-            current_direction = self.elevator_directions[elevator_id]
-            current_targets = self.elevator_target_floors[elevator_id]
-            
+            current_targets = elevator_target_floors[idx]
             if not current_targets:
                 continue
-                
-            # 获取当前主要目标
-            current_target = min(current_targets) if current_direction == 'up' else max(current_targets)
             
-            # 检查响应条件：
-            # 1. 方向必须匹配
-            direction_ok = self._is_direction_matching(current_floor, request_floor, current_direction)
-            # 2. 新请求必须在路径上（不会导致反向）
-            on_the_way = self._is_on_the_way(current_floor, current_target, request_floor, current_direction)
+            current_floor = elevator.current_floor
             
-            if direction_ok and on_the_way:
-                # 计算响应收益（节省的距离）
-                distance_to_target = abs(current_floor - current_target)
-                distance_to_request = abs(current_floor - request_floor)
-                benefit = distance_to_target - distance_to_request
-                
-                # 只考虑有实际收益的情况（节省距离>0）
-                if benefit > 0 and benefit > best_benefit:
-                    best_benefit = benefit
-                    best_candidate = (benefit, elevator_id, elevator, len(elevator.passengers))
+            # 响应条件：方向匹配且新请求在当前楼层与主要目标之间（不会导致反向）
+            # 满足条件时，节省的距离就是主要目标与请求楼层之差
+            if elevator_directions[idx] == 'up':
+                current_target = (current_targets & -current_targets).bit_length() - 1  # 最低位即最低目标楼层
+                if not current_floor <= request_floor <= current_target:
+                    continue
+                benefit = current_target - request_floor
+            else:
+                current_target = current_targets.bit_length() - 1  # 最高位即最高目标楼层
+                if not current_target <= request_floor <= current_floor:
+                    continue
+                benefit = request_floor - current_target
+            
+            # 只考虑有实际收益的情况（节省距离>0）
+            if benefit > best_benefit:
+                best_benefit = benefit
+                best_candidate = (benefit, elevator.id, elevator, len(elevator.passengers))
         
         return best_candidate
 
-    def _is_direction_matching(self, current_floor: int, request_floor: int, current_direction: str) -> bool:
-        """检查方向是否匹配"""
-        if current_direction == "up":
-            return request_floor >= current_floor
-        else:  # direction == "down"
-            return request_floor <= current_floor
-
-    def _is_on_the_way(self, current_floor: int, current_target: int, request_floor: int, direction: str) -> bool:
-        """检查新请求是否在当前路径上"""
-        if direction == "up":
-            return current_floor <= request_floor <= current_target
-        else:  # direction == "down"
-            return current_floor >= request_floor >= current_target
-
     def _redirect_elevator(self, elevator: ProxyElevator, request_floor: int, direction: str) -> None:
         """重定向电梯响应新请求"""
         elevator_id = elevator.id
         
         # 保留原有目标，只是增加新目标
         # 这样电梯会在F3接人后继续前往F5
-        self.elevator_target_floors[elevator_id].add(request_floor)
+        self.elevator_target_floors[self._id_to_idx[elevator_id]] |= 1 << request_floor
         
         # 不需要清空原有目标，也不需要改变方向
         # 电梯会自动按SCAN算法处理所有目标
         
-        print(f"    E{elevator_id} 将响应 F{request_floor} 的请求")
+        if self.debug:
+            print(f"    E{elevator_id} 将响应 F{request_floor} 的请求")
 
     def _wake_up_elevator(self, elevator: ProxyElevator, request_floor: int, direction: str) -> None:
         """唤醒休息电梯"""
-        elevator_id = elevator.id
-        self.elevator_states[elevator_id] = 'scanning'
+        idx = self._id_to_idx[elevator.id]
+        self.elevator_states[idx] = 'scanning'
         
         if request_floor > elevator.current_floor:
-            self.elevator_directions[elevator_id] = 'up'
+            self.elevator_directions[idx] = 'up'
         elif request_floor < elevator.current_floor:
-            self.elevator_directions[elevator_id] = 'down'
+            self.elevator_directions[idx] = 'down'
         else:
-            self.elevator_directions[elevator_id] = direction
+            self.elevator_directions[idx] = direction
         
         elevator.go_to_floor(request_floor)
-        self.elevator_target_floors[elevator_id].add(request_floor)
+        self.elevator_target_floors[idx] |= 1 << request_floor
 
     def on_elevator_idle(self, elevator: ProxyElevator) -> None:
         """
         电梯空闲时的回调
         检查是否有请求，没有则立即进入休息状态
         """
-        print(f" 电梯 E{elevator.id} 在 F{elevator.current_floor} 层空闲")
+        if self.debug:
+            print(f" 电梯 E{elevator.id} 在 F{elevator.current_floor} 层空闲")
         
+        idx = self._id_to_idx[elevator.id]
         # 清空目标楼层集合
-        self.elevator_target_floors[elevator.id].clear()
+        self.elevator_target_floors[idx] = 0
         
         # 检查是否还有未处理的请求
-        if self._has_pending_requests() or self._has_internal_requests(elevator):
+        if self._has_pending_requests() or self.passenger_destinations[idx]:
             # 有请求，继续SCAN算法
-            self.elevator_states[elevator.id] = 'scanning'
+            self.elevator_states[idx] = 'scanning'
             self._assign_next_floor(elevator)
         else:
             # 无请求，立即在当前楼层进入休息状态
@@ -300,139 +447,140 @@ class OptimizedScanController(ElevatorController):
 
     def _enter_resting_state(self, elevator: ProxyElevator) -> None:
         """让电梯进入休息状态"""
-        self.elevator_states[elevator.id] = 'resting'
+        self.elevator_states[self._id_to_idx[elevator.id]] = 'resting'
         current_floor = elevator.current_floor
         self.elevator_resting_floors[elevator.id] = current_floor
-        print(f"   💤 电梯 E{elevator.id} 在 F{current_floor} 进入休息状态，等待新请求")
+        if self.debug:
+            print(f"   💤 电梯 E{elevator.id} 在 F{current_floor} 进入休息状态，等待新请求")
 
     def on_elevator_stopped(self, elevator: ProxyElevator, floor: ProxyFloor) -> None:
         """
         电梯停靠时的回调
         处理当前楼层的请求，并决定下一个目标
         """
-        print(f" 电梯 E{elevator.id} 停靠在 F{floor.floor}")
+        if self.debug:
+            print(f" 电梯 E{elevator.id} 停靠在 F{floor.floor}")
         
         current_floor = floor.floor
-        direction = self.elevator_directions[elevator.id]
+        idx = self._id_to_idx[elevator.id]
+        direction = self.elevator_directions[idx]
         
         # 从目标集合中移除当前楼层
-        if current_floor in self.elevator_target_floors[elevator.id]:
-            self.elevator_target_floors[elevator.id].remove(current_floor)
+        bit = 1 << current_floor
+        self.elevator_target_floors[idx] &= ~bit
         
         # 从全局请求中移除当前楼层的同方向请求
-        if current_floor in self.floor_requests[direction]:
-            self.floor_requests[direction].remove(current_floor)
-            print(f"   移除 {direction} 方向在 F{current_floor} 的请求")
+        floor_requests = self.floor_requests
+        direction_requests = floor_requests[direction]
+        if direction_requests & bit:
+            floor_requests[direction] = direction_requests & ~bit
+            if self.debug:
+                print(f"   移除 {direction} 方向在 F{current_floor} 的请求")
         
         # 检查是否还有任务
-        if self._has_pending_requests() or self._has_internal_requests(elevator):
+        if self._has_pending_requests() or self.passenger_destinations[idx]:
             # 还有任务，继续SCAN算法
-            self.elevator_states[elevator.id] = 'scanning'
+            self.elevator_states[idx] = 'scanning'
             self._assign_next_floor(elevator)
         else:
             # 所有任务完成，立即进入休息状态
-            print(f"    电梯 E{elevator.id} 完成所有任务，在 F{current_floor} 进入休息状态")
+            if self.debug:
+                print(f"    电梯 E{elevator.id} 完成所有任务，在 F{current_floor} 进入休息状态")
             self._enter_resting_state(elevator)
 
     def _has_pending_requests(self) -> bool:
         """检查是否有未处理的请求"""
         return bool(self.floor_requests["up"] or self.floor_requests["down"])
 
-    def _has_internal_requests(self, elevator: ProxyElevator) -> bool:
-        """检查电梯内部是否有乘客请求"""
-        return bool(self.passenger_destinations[elevator.id])
-
     def _assign_next_floor(self, elevator: ProxyElevator) -> None:
         """
         SCAN算法的核心：为电梯分配下一个目标楼层
         """
         current_floor = elevator.current_floor
-        direction = self.elevator_directions[elevator.id]
+        idx = self._id_to_idx[elevator.id]
+        direction = self.elevator_directions[idx]
         
         # 获取当前方向上的所有请求（包括内部选层和外部呼叫）
         target_floors = self._get_floors_in_direction(elevator, direction)
         
         if target_floors:
-            # 在当前方向上有请求，选择最近的一个
+            # 在当前方向上有请求，选择最近的一个：上行取最低位，下行取最高位
             if direction == "up":
-                next_floor = min(target_floors)
+                next_floor = (target_floors & -target_floors).bit_length() - 1
             else:  # direction == "down"
-                next_floor = max(target_floors)
+                next_floor = target_floors.bit_length() - 1
             
-            print(f"   SCAN决策: E{elevator.id} {direction}方向 -> F{next_floor}")
+            if self.debug:
+                print(f"   SCAN决策: E{elevator.id} {direction}方向 -> F{next_floor}")
             elevator.go_to_floor(next_floor)
-            self.elevator_target_floors[elevator.id].add(next_floor)
+            self.elevator_target_floors[idx] |= 1 << next_floor
         else:
             # 当前方向没有请求，改变方向
             new_direction = "down" if direction == "up" else "up"
-            print(f"   SCAN决策: E{elevator.id} 改变方向 {direction} -> {new_direction}")
-            self.elevator_directions[elevator.id] = new_direction
+            if self.debug:
+                print(f"   SCAN决策: E{elevator.id} 改变方向 {direction} -> {new_direction}")
+            self.elevator_directions[idx] = new_direction
             
             # 在新方向上寻找目标
             new_target_floors = self._get_floors_in_direction(elevator, new_direction)
             if new_target_floors:
                 if new_direction == "up":
-                    next_floor = min(new_target_floors)
+                    next_floor = (new_target_floors & -new_target_floors).bit_length() - 1
                 else:
-                    next_floor = max(new_target_floors)
+                    next_floor = new_target_floors.bit_length() - 1
                 
-                print(f"   SCAN决策: E{elevator.id} {new_direction}方向 -> F{next_floor}")
+                if self.debug:
+                    print(f"   SCAN决策: E{elevator.id} {new_direction}方向 -> F{next_floor}")
                 elevator.go_to_floor(next_floor)
-                self.elevator_target_floors[elevator.id].add(next_floor)
+                self.elevator_target_floors[idx] |= 1 << next_floor
             else:
                 # 两个方向都没有请求，进入休息状态
-                print(f"   电梯 E{elevator.id} 无任务可执行")
+                if self.debug:
+                    print(f"   电梯 E{elevator.id} 无任务可执行")
                 self._enter_resting_state(elevator)
 
-    def _get_floors_in_direction(self, elevator: ProxyElevator, direction: str) -> Set[int]:
+    def _get_floors_in_direction(self, elevator: ProxyElevator, direction: str) -> int:
         """
-        获取指定方向上所有需要停靠的楼层
+        获取指定方向上所有需要停靠的楼层（位掩码）
         包括：内部选层 + 外部呼叫
         """
         current_floor = elevator.current_floor
-        target_floors = set()
         
-        # 内部选层请求（从我们记录的乘客目的地中获取）
-        elevator_id = elevator.id
-        for passenger_id, destination in self.passenger_destinations[elevator_id].items():
-            if ((direction == "up" and destination > current_floor) or
-                (direction == "down" and destination < current_floor)):
-                target_floors.add(destination)
+        # 需要停靠的楼层：两个方向的外部呼叫 + 内部选层（从我们记录的乘客目的地中获取）
+        stop_mask = self.floor_requests["up"] | self.floor_requests["down"]
+        for destination in self.passenger_destinations[self._id_to_idx[elevator.id]].values():
+            stop_mask |= 1 << destination
         
-        # 外部呼叫请求
+        # 与方向范围掩码做一次按位与
         if direction == "up":
-            # 上行：当前楼层以上的上行和下行请求
-            for floor_num in self.floor_requests["up"] | self.floor_requests["down"]:
-                if floor_num > current_floor:
-                    target_floors.add(floor_num)
-        else:  # direction == "down"
-            # 下行：当前楼层以下的上行和下行请求
-            for floor_num in self.floor_requests["up"] | self.floor_requests["down"]:
-                if floor_num < current_floor:
-                    target_floors.add(floor_num)
-        
-        return target_floors
+            # 上行：当前楼层以上的楼层
+            return stop_mask & -(1 << (current_floor + 1))
+        # direction == "down"：当前楼层以下的楼层
+        return stop_mask & ((1 << current_floor) - 1)
 
     def on_passenger_board(self, elevator: ProxyElevator, passenger: ProxyPassenger) -> None:
         """
         乘客上梯时的回调
         记录乘客的目标楼层
         """
-        print(f"    乘客{passenger.id} 上 E{elevator.id} (F{elevator.current_floor} -> F{passenger.destination})")
-        self.passenger_destinations[elevator.id][passenger.id] = passenger.destination
+        if self.debug:
+            print(f"    乘客{passenger.id} 上 E{elevator.id} (F{elevator.current_floor} -> F{passenger.destination})")
+        idx = self._id_to_idx[elevator.id]
+        self.passenger_destinations[idx][passenger.id] = passenger.destination
         
-        if self.elevator_states[elevator.id] == 'resting':
-            self.elevator_states[elevator.id] = 'scanning'
-            print(f"   电梯 E{elevator.id} 因乘客上梯而激活")
+        if self.elevator_states[idx] == 'resting':
+            self.elevator_states[idx] = 'scanning'
+            if self.debug:
+                print(f"   电梯 E{elevator.id} 因乘客上梯而激活")
 
     def on_passenger_alight(self, elevator: ProxyElevator, passenger: ProxyPassenger, floor: ProxyFloor) -> None:
         """
         乘客下车时的回调
         移除记录的乘客目的地
         """
-        print(f"    乘客{passenger.id} 下 E{elevator.id} 在 F{floor.floor}")
-        if passenger.id in self.passenger_destinations[elevator.id]:
-            del self.passenger_destinations[elevator.id][passenger.id]
+        if self.debug:
+            print(f"    乘客{passenger.id} 下 E{elevator.id} 在 F{floor.floor}")
+        self.passenger_destinations[self._id_to_idx[elevator.id]].pop(passenger.id, None)
 
     def on_elevator_passing_floor(self, elevator: ProxyElevator, floor: ProxyFloor, direction: str) -> None:
         """电梯经过楼层时的回调"""
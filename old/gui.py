@@ -9,10 +9,10 @@ from typing import Dict, List, Set
 from collections import defaultdict
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QLabel, QPushButton, QTextEdit, 
+                            QHBoxLayout, QLabel, QPushButton, QPlainTextEdit, 
                             QGroupBox, QGridLayout, QFrame, QSplitter)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QPropertyAnimation, QEasingCurve, QRect
-from PyQt6.QtGui import QFont, QColor, QPalette, QPainter, QLinearGradient, QPen, QBrush
+from PyQt6.QtGui import QFont, QColor, QPalette, QPainter, QLinearGradient, QPen, QBrush, QPixmap
 
 from elevator_saga.client.base_controller import ElevatorController
 from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
@@ -22,7 +22,9 @@ from elevator_saga.core.models import Direction, SimulationEvent
 class SignalBridge(QObject):
     """信号桥接器"""
     log_message = pyqtSignal(str, str)  # message, level
+    log_batch = pyqtSignal(list)  # [(message, level), ...]，每个tick合并发送一次
     unit_status = pyqtSignal(dict)
+    unit_status_batch = pyqtSignal(list)  # [unit_status数据, ...]，每个tick每台电梯最多一条
     call_status = pyqtSignal(dict)
 
 
@@ -39,10 +41,14 @@ class ElevatorCard(QWidget):
         self.load_count = 0
         self.targets = []
         self.animation_progress = 0
+        # 状态变化只打标记，由定时器统一重绘，同一帧内的多次更新只画一次
+        self._dirty = False
+        # 背景、井道和楼层刻度不随状态变化，缓存为位图，尺寸变化时重建
+        self._static_pix = None
         self.setup_ui()
         
-        # 动画定时器
-        self.anim_timer = QTimer()
+        # 动画定时器（兼作重绘节拍）
+        self.anim_timer = QTimer(self)
         self.anim_timer.timeout.connect(self.update_animation)
         self.anim_timer.start(50)
         
@@ -61,23 +67,46 @@ class ElevatorCard(QWidget):
     def paintEvent(self, event):
         """绘制电梯卡片"""
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
-        # 绘制背景
-        self._draw_background(painter)
+        # 背景和电梯井（缓存位图，直接贴图不需要抗锯齿）
+        painter.drawPixmap(0, 0, self._static_layer())
+        
+        # 圆角矩形、圆点和箭头需要抗锯齿
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         # 绘制标题
         self._draw_header(painter)
         
-        # 绘制电梯井
-        self._draw_shaft(painter)
+        # 目标楼层标记（只画落在重绘区域内的楼层）
+        self._draw_targets(painter, event.rect())
         
         # 绘制电梯轿厢
         self._draw_cabin(painter)
         
-        # 绘制信息面板
+        # 绘制信息面板（纯文本，文字抗锯齿由TextAntialiasing单独控制）
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
         self._draw_info_panel(painter)
         
+    def resizeEvent(self, event):
+        """尺寸变化后静态层需要重建"""
+        super().resizeEvent(event)
+        self._static_pix = None
+    
+    def _static_layer(self):
+        """返回背景和电梯井的缓存位图，必要时重新绘制"""
+        if self._static_pix is None:
+            ratio = self.devicePixelRatioF()
+            pix = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+            pix.setDevicePixelRatio(ratio)
+            pix.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pix)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            self._draw_background(painter)
+            self._draw_shaft(painter)
+            painter.end()
+            self._static_pix = pix
+        return self._static_pix
+    
     def _draw_background(self, painter):
         """绘制背景"""
         gradient = QLinearGradient(0, 0, 0, self.height())
@@ -106,7 +135,7 @@ class ElevatorCard(QWidget):
         painter.drawEllipse(self.width() - 35, 15, 20, 20)
         
     def _draw_shaft(self, painter):
-        """绘制电梯井道"""
+        """绘制电梯井道和楼层刻度（静态部分）"""
         shaft_x = 40
         shaft_y = 70
         shaft_width = 100
@@ -117,24 +146,43 @@ class ElevatorCard(QWidget):
         painter.setBrush(QColor(240, 240, 240))
         painter.drawRoundedRect(shaft_x, shaft_y, shaft_width, shaft_height, 8, 8)
         
-        # 绘制楼层线
+        # 绘制楼层线（水平线，关闭抗锯齿）
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
         level_height = shaft_height / self.max_levels
-        painter.setPen(QPen(QColor(220, 220, 220), 1))
+        line_pen = QPen(QColor(220, 220, 220), 1)
+        label_color = QColor(120, 120, 120)
+        painter.setFont(QFont("Arial", 8))
         
         for i in range(self.max_levels + 1):
             y = int(shaft_y + shaft_height - (i * level_height))
+            painter.setPen(line_pen)
             painter.drawLine(shaft_x, y, shaft_x + shaft_width, y)
             
             # 楼层标签
-            painter.setPen(QColor(120, 120, 120))
-            painter.setFont(QFont("Arial", 8))
+            painter.setPen(label_color)
             painter.drawText(shaft_x - 25, y + 4, f"F{i}")
-            
-            # 目标楼层标记
-            if i in self.targets:
-                painter.setPen(Qt.PenStyle.NoPen)
-                painter.setBrush(QColor(255, 193, 7, 150))
-                painter.drawEllipse(shaft_x + shaft_width + 5, y - 4, 8, 8)
+    
+    def _draw_targets(self, painter, dirty_rect):
+        """绘制目标楼层标记，只画与dirty_rect相交的楼层"""
+        shaft_x = 40
+        shaft_y = 70
+        shaft_width = 100
+        shaft_height = 300
+        
+        level_height = shaft_height / self.max_levels
+        # 标记在楼层线上下4像素内
+        top = dirty_rect.top() - 4
+        bottom = dirty_rect.bottom() + 4
+        
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 193, 7, 150))
+        for i in self.targets:
+            if not 0 <= i <= self.max_levels:
+                continue
+            y = int(shaft_y + shaft_height - (i * level_height))
+            if y < top or y > bottom:
+                continue
+            painter.drawEllipse(shaft_x + shaft_width + 5, y - 4, 8, 8)
         
     def _draw_cabin(self, painter):
         """绘制电梯轿厢"""
@@ -235,7 +283,8 @@ class ElevatorCard(QWidget):
     def update_animation(self):
         """更新动画"""
         self.animation_progress = (self.animation_progress + 1) % 100
-        if self.status == "moving":
+        if self._dirty:
+            self._dirty = False
             self.update()
     
     def update_state(self, state_data):
@@ -245,7 +294,7 @@ class ElevatorCard(QWidget):
         self.status = state_data.get('status', 'idle')
         self.load_count = state_data.get('load_count', 0)
         self.targets = state_data.get('targets', [])
-        self.update()
+        self._dirty = True
 
 
 class CallIndicatorPanel(QWidget):
@@ -256,8 +305,14 @@ class CallIndicatorPanel(QWidget):
         self.max_levels = max_levels
         self.up_calls = set()
         self.down_calls = set()
+        self._dirty = False
         self.setFixedWidth(120)
         
+        # 重绘定时器，与电梯卡片相同的节拍
+        self.repaint_timer = QTimer(self)
+        self.repaint_timer.timeout.connect(self._flush_dirty)
+        self.repaint_timer.start(50)
+        
     def paintEvent(self, event):
         """绘制呼叫指示"""
         painter = QPainter(self)
@@ -270,9 +325,15 @@ class CallIndicatorPanel(QWidget):
         
         # 绘制楼层呼叫
         level_height = (self.height() - 50) / self.max_levels
+        # 呼叫指示圆点占楼层线上方4像素到下方8像素，只画与重绘区域相交的楼层
+        dirty_rect = event.rect()
+        top = dirty_rect.top() - 8
+        bottom = dirty_rect.bottom() + 4
         
         for i in range(self.max_levels + 1):
             y = int(self.height() - 20 - (i * level_height))
+            if y < top or y > bottom:
+                continue
             
             # 楼层标签
             painter.setPen(QColor(120, 120, 120))
@@ -301,11 +362,17 @@ class CallIndicatorPanel(QWidget):
         """更新呼叫状态"""
         self.up_calls = up_calls
         self.down_calls = down_calls
-        self.update()
+        self._dirty = True
+    
+    def _flush_dirty(self):
+        """有未绘制的变化时才重绘"""
+        if self._dirty:
+            self._dirty = False
+            self.update()
 
 
-class ModernLogViewer(QTextEdit):
-    """现代日志查看器"""
+class ModernLogViewer(QPlainTextEdit):
+    """现代日志查看器（纯文本文档，超出行数上限时由Qt丢弃最早的行）"""
     
     def __init__(self):
         super().__init__()
@@ -320,9 +387,11 @@ class ModernLogViewer(QTextEdit):
     def setup_ui(self):
         """设置UI样式"""
         self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(300)
         self.setFont(QFont("Courier New", 9))
         self.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #263238;
                 color: #ECEFF1;
                 border: none;
@@ -333,22 +402,20 @@ class ModernLogViewer(QTextEdit):
         
     def append_log(self, message, level='info'):
         """添加日志"""
+        self.append_logs([(message, level)])
+    
+    def append_logs(self, entries):
+        """批量添加日志，整批在一次调用中写入，每条日志占一行"""
+        if not entries:
+            return
         import time
         timestamp = time.strftime("%H:%M:%S")
-        color = self.log_colors.get(level, '#ECEFF1')
-        
-        html = f'<span style="color: #78909C;">[{timestamp}]</span> '
-        html += f'<span style="color: {color};">{message}</span>'
+        prefix = f'<span style="color: #78909C;">[{timestamp}]</span> '
         
-        self.append(html)
-        
-        # 限制行数
-        doc = self.document()
-        if doc.lineCount() > 300:
-            cursor = self.textCursor()
-            cursor.movePosition(cursor.MoveOperation.Start)
-            cursor.movePosition(cursor.MoveOperation.Down, cursor.MoveMode.KeepAnchor, 50)
-            cursor.removeSelectedText()
+        # 行数上限由setMaximumBlockCount保证，不需要手动裁剪
+        for message, level in entries:
+            color = self.log_colors.get(level, '#ECEFF1')
+            self.appendHtml(f'{prefix}<span style="color: {color};">{message}</span>')
         
         # 滚动到底部
         self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
@@ -441,6 +508,10 @@ class VisualizationController(ElevatorController):
         self.unit_capacity = 10
         self.zone_assignment = {}
         
+        # 待发送的日志和电梯状态，每个tick结束时合并成一次信号发送
+        self._log_buf = []
+        self._pending_units = {}  # 电梯编号 -> 最新状态
+        
         # 统计
         self.stats = {
             'total_calls': 0,
@@ -468,6 +539,9 @@ class VisualizationController(ElevatorController):
             
             # 发送初始状态
             self._emit_unit_status(unit)
+        
+        self._flush_logs()
+        self._flush_unit_status()
 
     def _calculate_home_position(self, index: int, total: int) -> int:
         """计算初始位置"""
@@ -625,12 +699,18 @@ class VisualizationController(ElevatorController):
         self._emit_unit_status(elevator)
 
     def _emit_log(self, message, level='info'):
-        """发送日志"""
+        """登记日志，等到tick结束统一发送"""
         if self.signals:
-            self.signals.log_message.emit(message, level)
+            self._log_buf.append((message, level))
+
+    def _flush_logs(self):
+        """把本tick积累的日志合并成一次信号发送"""
+        if self._log_buf:
+            self.signals.log_batch.emit(self._log_buf)
+            self._log_buf = []
 
     def _emit_unit_status(self, unit):
-        """发送电梯状态"""
+        """登记电梯状态，等到tick结束统一发送"""
         if self.signals:
             data = {
                 'id': unit.id,
@@ -640,7 +720,14 @@ class VisualizationController(ElevatorController):
                 'load_count': len(unit.passengers),
                 'targets': self.service_queue[unit.id]
             }
-            self.signals.unit_status.emit(data)
+            # 同一tick内同一电梯的多次更新只保留最后一次
+            self._pending_units[unit.id] = data
+
+    def _flush_unit_status(self):
+        """把本tick各电梯的最新状态合并成一次信号发送"""
+        if self._pending_units:
+            self.signals.unit_status_batch.emit(list(self._pending_units.values()))
+            self._pending_units = {}
 
     def _emit_call_status(self):
         """发送呼叫状态"""
@@ -656,7 +743,8 @@ class VisualizationController(ElevatorController):
         pass
     
     def on_event_execute_end(self, tick, events, elevators, floors):
-        pass
+        self._flush_logs()
+        self._flush_unit_status()
     
     def on_elevator_passing_floor(self, elevator, floor, direction):
         pass
@@ -703,10 +791,10 @@ class ElevatorMonitorSystem(QMainWindow):
         self.call_panel = CallIndicatorPanel()
         content_splitter.addWidget(self.call_panel)
         
-        # 中间：电梯卡片区
+        # 中间：电梯卡片区（卡片放在可整体替换的子容器中，见create_unit_cards）
         self.cards_container = QWidget()
-        self.cards_layout = QHBoxLayout(self.cards_container)
-        self.cards_layout.setSpacing(20)
+        self._cards_outer = QHBoxLayout(self.cards_container)
+        self._new_cards_host()
         content_splitter.addWidget(self.cards_container)
         
         # 右侧：日志和统计
@@ -812,9 +900,13 @@ class ElevatorMonitorSystem(QMainWindow):
         self.pause_btn.clicked.connect(self.pause_simulation)
         self.reset_btn.clicked.connect(self.reset_simulation)
         
-        self.signals.log_message.connect(self.log_viewer.append_log)
-        self.signals.unit_status.connect(self.update_unit_display)
-        self.signals.call_status.connect(self.update_call_display)
+        # 信号由模拟线程发出、在界面线程处理，显式使用排队连接
+        queued = Qt.ConnectionType.QueuedConnection
+        self.signals.log_message.connect(self.log_viewer.append_log, queued)
+        self.signals.log_batch.connect(self.log_viewer.append_logs, queued)
+        self.signals.unit_status.connect(self.update_unit_display, queued)
+        self.signals.unit_status_batch.connect(self.update_unit_batch, queued)
+        self.signals.call_status.connect(self.update_call_display, queued)
     
     def start_simulation(self):
         """启动模拟"""
@@ -858,9 +950,11 @@ class ElevatorMonitorSystem(QMainWindow):
     
     def create_unit_cards(self, count):
         """创建电梯卡片"""
-        # 清除现有卡片
-        for i in reversed(range(self.cards_layout.count())):
-            self.cards_layout.itemAt(i).widget().setParent(None)
+        # 清除现有卡片：整个子容器移出布局后延迟删除，不逐个卡片重设父对象
+        old_host = self._cards_host
+        self._cards_outer.removeWidget(old_host)
+        old_host.deleteLater()
+        self._new_cards_host()
         
         self.unit_cards = {}
         for i in range(count):
@@ -868,6 +962,15 @@ class ElevatorMonitorSystem(QMainWindow):
             self.unit_cards[i] = card
             self.cards_layout.addWidget(card)
     
+    def _new_cards_host(self):
+        """创建承载电梯卡片的子容器，cards_layout 始终指向当前子容器的布局"""
+        host = QWidget()
+        self.cards_layout = QHBoxLayout(host)
+        self.cards_layout.setContentsMargins(0, 0, 0, 0)
+        self.cards_layout.setSpacing(20)
+        self._cards_host = host
+        self._cards_outer.addWidget(host)
+    
     def run_simulation(self):
         """运行模拟"""
         try:
@@ -882,6 +985,14 @@ class ElevatorMonitorSystem(QMainWindow):
         if unit_id in self.unit_cards:
             self.unit_cards[unit_id].update_state(data)
     
+    def update_unit_batch(self, batch):
+        """批量更新电梯显示，卡片只记录状态，由各自的定时器重绘"""
+        unit_cards = self.unit_cards
+        for data in batch:
+            card = unit_cards.get(data.get('id'))
+            if card is not None:
+                card.update_state(data)
+    
     def update_call_display(self, data):
         """更新呼叫显示"""
         self.call_panel.update_calls(
@@ -5,13 +5,40 @@
 运送结束后立即停在当前楼层进入休息状态，优先响应新请求
 智能响应逻辑：优先顺路工作电梯（包括有载电梯），其次休息电梯
 """
-from typing import Dict, List, Set
+from typing import Dict, List, Optional
 
 from elevator_saga.client.base_controller import ElevatorController
 from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
 from elevator_saga.core.models import Direction, SimulationEvent
 
 
+def _mask_floors(mask: int) -> List[int]:
+    """将楼层位掩码展开为升序楼层列表（仅用于输出）"""
+    floors = []
+    while mask:
+        low = mask & -mask
+        floors.append(low.bit_length() - 1)
+        mask ^= low
+    return floors
+
+
+def _nearest_in_direction(mask: int, current_floor: int, direction: str) -> Optional[int]:
+    """LOOK选层：楼层位掩码中指定方向上最近的楼层，没有则返回None
+
+    上行取高于当前楼层的最低楼层，下行取低于当前楼层的最高楼层
+    """
+    if direction == "up":
+        above = mask >> (current_floor + 1)
+        if not above:
+            return None
+        return current_floor + (above & -above).bit_length()
+    # direction == "down"
+    below = mask & ((1 << current_floor) - 1)
+    if not below:
+        return None
+    return below.bit_length() - 1
+
+
 class OptimizedScanController(ElevatorController):
     """
     优化的SCAN电梯调度算法 - 智能响应版
@@ -23,10 +50,10 @@ class OptimizedScanController(ElevatorController):
         """初始化控制器"""
         super().__init__(server_url, debug)
         self.elevator_directions: Dict[int, str] = {}  # 记录每个电梯的当前方向
-        self.elevator_target_floors: Dict[int, Set[int]] = {}  # 记录每个电梯的目标楼层集合
+        self.elevator_target_floors: Dict[int, int] = {}  # 记录每个电梯的目标楼层（位掩码，第f位表示楼层f）
         self.passenger_destinations: Dict[int, Dict[int, int]] = {}  # 记录乘客目的地
         self.max_floor = 0  # 最大楼层数
-        self.floor_requests: Dict[str, Set[int]] = {"up": set(), "down": set()}  # 记录各方向的楼层请求
+        self.floor_requests: Dict[str, int] = {"up": 0, "down": 0}  # 记录各方向的楼层请求（位掩码）
         self.elevator_resting_floors: Dict[int, int] = {}  # 记录电梯的休息楼层（初始位置）
         self.elevator_states: Dict[int, str] = {}  # 记录电梯状态: 'resting', 'scanning'
 
@@ -42,7 +69,7 @@ class OptimizedScanController(ElevatorController):
         # 初始化每个电梯的状态
         for i, elevator in enumerate(elevators):
             self.elevator_directions[elevator.id] = "up"  # 初始方向向上
-            self.elevator_target_floors[elevator.id] = set()
+            self.elevator_target_floors[elevator.id] = 0
             self.passenger_destinations[elevator.id] = {}
             self.elevator_states[elevator.id] = 'resting'  # 初始状态为休息
             
@@ -66,18 +93,27 @@ class OptimizedScanController(ElevatorController):
         self, tick: int, events: List[SimulationEvent], elevators: List[ProxyElevator], floors: List[ProxyFloor]
     ) -> None:
         """事件执行前的回调"""
+        # 逐tick的事件和电梯状态输出只在调试模式下进行
+        if not self.debug:
+            return
+        
         if events:
             event_types = [e.type.value for e in events]
             if any(event in event_types for event in ['passenger_call', 'elevator_idle', 'elevator_stopped']):
                 print(f"Tick {tick}: 处理 {len(events)} 个事件 {event_types}")
         
         # 显示电梯状态
+        elevator_directions = self.elevator_directions
+        elevator_states = self.elevator_states
+        elevator_target_floors = self.elevator_target_floors
         for elevator in elevators:
+            elevator_id = elevator.id
             passenger_count = len(elevator.passengers)
-            direction = self.elevator_directions[elevator.id]
-            state = self.elevator_states[elevator.id]
-            target_info = f"目标:{list(self.elevator_target_floors[elevator.id])}" if self.elevator_target_floors[elevator.id] else "无目标"
-            print(f"   E{elevator.id}[{direction}|{state}] 在 F{elevator.current_floor} {target_info} 乘客:{passenger_count}")
+            direction = elevator_directions[elevator_id]
+            state = elevator_states[elevator_id]
+            targets = elevator_target_floors[elevator_id]
+            target_info = f"目标:{_mask_floors(targets)}" if targets else "无目标"
+            print(f"   E{elevator_id}[{direction}|{state}] 在 F{elevator.current_floor} {target_info} 乘客:{passenger_count}")
 
     def on_event_execute_end(
         self, tick: int, events: List[SimulationEvent], elevators: List[ProxyElevator], floors: List[ProxyFloor]
@@ -90,9 +126,11 @@ class OptimizedScanController(ElevatorController):
         乘客呼叫时的回调
         记录楼层请求，智能选择电梯响应
         """
-        print(f" 乘客 {passenger.id} 在 F{floor.floor} 请求 {direction} 方向")
-        self.floor_requests[direction].add(floor.floor)
-        print(f"   当前请求 - 上行: {sorted(self.floor_requests['up'])}, 下行: {sorted(self.floor_requests['down'])}")
+        if self.debug:
+            print(f" 乘客 {passenger.id} 在 F{floor.floor} 请求 {direction} 方向")
+        self.floor_requests[direction] |= 1 << floor.floor
+        if self.debug:
+            print(f"   当前请求 - 上行: {_mask_floors(self.floor_requests['up'])}, 下行: {_mask_floors(self.floor_requests['down'])}")
         
         # 智能选择电梯响应请求
         self._smart_assign_elevator(floor.floor, direction)
@@ -105,15 +143,17 @@ class OptimizedScanController(ElevatorController):
         working_candidate = self._find_working_elevator_candidate(request_floor, direction)
         if working_candidate:
             benefit, elevator_id, elevator, passenger_count = working_candidate
-            load_info = "空载" if passenger_count == 0 else f"有载({passenger_count}人)"
-            print(f"    智能响应: E{elevator_id} {load_info} 顺路响应 F{request_floor} 的请求 (节省距离: {benefit}层)")
+            if self.debug:
+                load_info = "空载" if passenger_count == 0 else f"有载({passenger_count}人)"
+                print(f"    智能响应: E{elevator_id} {load_info} 顺路响应 F{request_floor} 的请求 (节省距离: {benefit}层)")
             self._redirect_elevator(elevator, request_floor, direction)
             return
         
         # 没有顺路工作电梯时，寻找休息电梯
         resting_elevators = []
+        elevator_states = self.elevator_states
         for elevator in self.elevators:
-            if self.elevator_states[elevator.id] == 'resting':
+            if elevator_states[elevator.id] == 'resting':
                 distance = abs(elevator.current_floor - request_floor)
                 resting_elevators.append((distance, elevator.id, elevator))
         
@@ -121,11 +161,13 @@ class OptimizedScanController(ElevatorController):
             # 使用最近的休息电梯
             resting_elevators.sort(key=lambda x: x[0])
             closest_distance, closest_id, closest_elevator = resting_elevators[0]
-            print(f"    唤醒休息电梯 E{closest_id} 处理 F{request_floor} 的请求 (距离: {closest_distance}层)")
+            if self.debug:
+                print(f"    唤醒休息电梯 E{closest_id} 处理 F{request_floor} 的请求 (距离: {closest_distance}层)")
             self._wake_up_elevator(closest_elevator, request_floor, direction)
             return
         
-        print(f"     无合适电梯可用，等待扫描中的电梯自然处理请求")
+        if self.debug:
+            print(f"     无合适电梯可用，等待扫描中的电梯自然处理请求")
 
     def _find_working_elevator_candidate(self, request_floor: int, direction: str):
         """
@@ -133,23 +175,30 @@ class OptimizedScanController(ElevatorController):
         """
         best_candidate = None
         best_benefit = 0
+        # 循环内反复用到的字典先取到局部变量
+        elevator_states = self.elevator_states
+        elevator_directions = self.elevator_directions
+        elevator_target_floors = self.elevator_target_floors
         
         for elevator in self.elevators:
             elevator_id = elevator.id
             
             # 只考虑工作中的电梯（不限制是否空载）
-            if self.elevator_states[elevator_id] != 'scanning':
+            if elevator_states[elevator_id] != 'scanning':
                 continue
             
-            current_floor = elevator.current_floor
-            current_direction = self.elevator_directions[elevator_id]
-            current_targets = self.elevator_target_floors[elevator_id]
-            
+            current_targets = elevator_target_floors[elevator_id]
             if not current_targets:
                 continue
-                
+            
+            current_floor = elevator.current_floor
+            current_direction = elevator_directions[elevator_id]
+            
             # 获取当前主要目标
-            current_target = min(current_targets) if current_direction == 'up' else max(current_targets)
+            if current_direction == 'up':
+                current_target = (current_targets & -current_targets).bit_length() - 1  # 最低位即最低目标楼层
+            else:
+                current_target = current_targets.bit_length() - 1  # 最高位即最高目标楼层
             
             # 检查响应条件：
             # 1. 方向必须匹配
@@ -190,12 +239,13 @@ class OptimizedScanController(ElevatorController):
         
         # 保留原有目标，只是增加新目标
         # 这样电梯会在F3接人后继续前往F5
-        self.elevator_target_floors[elevator_id].add(request_floor)
+        self.elevator_target_floors[elevator_id] |= 1 << request_floor
         
         # 不需要清空原有目标，也不需要改变方向
         # 电梯会自动按SCAN算法处理所有目标
         
-        print(f"    E{elevator_id} 将响应 F{request_floor} 的请求")
+        if self.debug:
+            print(f"    E{elevator_id} 将响应 F{request_floor} 的请求")
 
     def _wake_up_elevator(self, elevator: ProxyElevator, request_floor: int, direction: str) -> None:
         """唤醒休息电梯"""
@@ -210,17 +260,18 @@ class OptimizedScanController(ElevatorController):
             self.elevator_directions[elevator_id] = direction
         
         elevator.go_to_floor(request_floor)
-        self.elevator_target_floors[elevator_id].add(request_floor)
+        self.elevator_target_floors[elevator_id] |= 1 << request_floor
 
     def on_elevator_idle(self, elevator: ProxyElevator) -> None:
         """
         电梯空闲时的回调
         检查是否有请求，没有则立即进入休息状态
         """
-        print(f" 电梯 E{elevator.id} 在 F{elevator.current_floor} 层空闲")
+        if self.debug:
+            print(f" 电梯 E{elevator.id} 在 F{elevator.current_floor} 层空闲")
         
         # 清空目标楼层集合
-        self.elevator_target_floors[elevator.id].clear()
+        self.elevator_target_floors[elevator.id] = 0
         
         # 检查是否还有未处理的请求
         if self._has_pending_requests() or self._has_internal_requests(elevator):
@@ -236,35 +287,43 @@ class OptimizedScanController(ElevatorController):
         self.elevator_states[elevator.id] = 'resting'
         current_floor = elevator.current_floor
         self.elevator_resting_floors[elevator.id] = current_floor
-        print(f"    电梯 E{elevator.id} 在 F{current_floor} 进入休息状态，等待新请求")
+        if self.debug:
+            print(f"    电梯 E{elevator.id} 在 F{current_floor} 进入休息状态，等待新请求")
 
     def on_elevator_stopped(self, elevator: ProxyElevator, floor: ProxyFloor) -> None:
         """
         电梯停靠时的回调
         处理当前楼层的请求，并决定下一个目标
         """
-        print(f" 电梯 E{elevator.id} 停靠在 F{floor.floor}")
+        elevator_id = elevator.id
+        debug = self.debug
+        if debug:
+            print(f" 电梯 E{elevator_id} 停靠在 F{floor.floor}")
         
         current_floor = floor.floor
-        direction = self.elevator_directions[elevator.id]
+        direction = self.elevator_directions[elevator_id]
+        floor_requests = self.floor_requests
         
         # 从目标集合中移除当前楼层
-        if current_floor in self.elevator_target_floors[elevator.id]:
-            self.elevator_target_floors[elevator.id].remove(current_floor)
+        bit = 1 << current_floor
+        self.elevator_target_floors[elevator_id] &= ~bit
         
         # 从全局请求中移除当前楼层的同方向请求
-        if current_floor in self.floor_requests[direction]:
-            self.floor_requests[direction].remove(current_floor)
-            print(f"   移除 {direction} 方向在 F{current_floor} 的请求")
+        direction_requests = floor_requests[direction]
+        if direction_requests & bit:
+            floor_requests[direction] = direction_requests & ~bit
+            if debug:
+                print(f"   移除 {direction} 方向在 F{current_floor} 的请求")
         
         # 检查是否还有任务
         if self._has_pending_requests() or self._has_internal_requests(elevator):
             # 还有任务，继续SCAN算法
-            self.elevator_states[elevator.id] = 'scanning'
+            self.elevator_states[elevator_id] = 'scanning'
             self._assign_next_floor(elevator)
         else:
             # 所有任务完成，立即进入休息状态
-            print(f"    电梯 E{elevator.id} 完成所有任务，在 F{current_floor} 进入休息状态")
+            if debug:
+                print(f"    电梯 E{elevator_id} 完成所有任务，在 F{current_floor} 进入休息状态")
             self._enter_resting_state(elevator)
 
     def _has_pending_requests(self) -> bool:
@@ -279,91 +338,65 @@ class OptimizedScanController(ElevatorController):
         """
         SCAN算法的核心：为电梯分配下一个目标楼层
         """
+        elevator_id = elevator.id
+        debug = self.debug
         current_floor = elevator.current_floor
-        direction = self.elevator_directions[elevator.id]
+        direction = self.elevator_directions[elevator_id]
+        floor_requests = self.floor_requests
+        # 需要停靠的楼层：内部选层 + 两个方向的外部呼叫，合并为一个位掩码
+        stop_mask = floor_requests["up"] | floor_requests["down"]
+        for destination in self.passenger_destinations[elevator_id].values():
+            stop_mask |= 1 << destination
         
-        # 获取当前方向上的所有请求（包括内部选层和外部呼叫）
-        target_floors = self._get_floors_in_direction(elevator, direction)
+        # 当前方向上最近的请求
+        next_floor = _nearest_in_direction(stop_mask, current_floor, direction)
         
-        if target_floors:
-            # 在当前方向上有请求，选择最近的一个
-            if direction == "up":
-                next_floor = min(target_floors)
-            else:  # direction == "down"
-                next_floor = max(target_floors)
-            
-            print(f"   SCAN决策: E{elevator.id} {direction}方向 -> F{next_floor}")
+        if next_floor is not None:
+            if debug:
+                print(f"   SCAN决策: E{elevator_id} {direction}方向 -> F{next_floor}")
             elevator.go_to_floor(next_floor)
-            self.elevator_target_floors[elevator.id].add(next_floor)
+            self.elevator_target_floors[elevator_id] |= 1 << next_floor
         else:
             # 当前方向没有请求，改变方向
             new_direction = "down" if direction == "up" else "up"
-            print(f"   SCAN决策: E{elevator.id} 改变方向 {direction} -> {new_direction}")
-            self.elevator_directions[elevator.id] = new_direction
+            if debug:
+                print(f"   SCAN决策: E{elevator_id} 改变方向 {direction} -> {new_direction}")
+            self.elevator_directions[elevator_id] = new_direction
             
             # 在新方向上寻找目标
-            new_target_floors = self._get_floors_in_direction(elevator, new_direction)
-            if new_target_floors:
-                if new_direction == "up":
-                    next_floor = min(new_target_floors)
-                else:
-                    next_floor = max(new_target_floors)
-                
-                print(f"   SCAN决策: E{elevator.id} {new_direction}方向 -> F{next_floor}")
+            next_floor = _nearest_in_direction(stop_mask, current_floor, new_direction)
+            if next_floor is not None:
+                if debug:
+                    print(f"   SCAN决策: E{elevator_id} {new_direction}方向 -> F{next_floor}")
                 elevator.go_to_floor(next_floor)
-                self.elevator_target_floors[elevator.id].add(next_floor)
+                self.elevator_target_floors[elevator_id] |= 1 << next_floor
             else:
                 # 两个方向都没有请求，进入休息状态
-                print(f"     电梯 E{elevator.id} 无任务可执行")
+                if debug:
+                    print(f"     电梯 E{elevator_id} 无任务可执行")
                 self._enter_resting_state(elevator)
 
-    def _get_floors_in_direction(self, elevator: ProxyElevator, direction: str) -> Set[int]:
-        """
-        获取指定方向上所有需要停靠的楼层
-        包括：内部选层 + 外部呼叫
-        """
-        current_floor = elevator.current_floor
-        target_floors = set()
-        
-        # 内部选层请求（从我们记录的乘客目的地中获取）
-        elevator_id = elevator.id
-        for passenger_id, destination in self.passenger_destinations[elevator_id].items():
-            if ((direction == "up" and destination > current_floor) or
-                (direction == "down" and destination < current_floor)):
-                target_floors.add(destination)
-        
-        # 外部呼叫请求
-        if direction == "up":
-            # 上行：当前楼层以上的上行和下行请求
-            for floor_num in self.floor_requests["up"] | self.floor_requests["down"]:
-                if floor_num > current_floor:
-                    target_floors.add(floor_num)
-        else:  # direction == "down"
-            # 下行：当前楼层以下的上行和下行请求
-            for floor_num in self.floor_requests["up"] | self.floor_requests["down"]:
-                if floor_num < current_floor:
-                    target_floors.add(floor_num)
-        
-        return target_floors
-
     def on_passenger_board(self, elevator: ProxyElevator, passenger: ProxyPassenger) -> None:
         """
         乘客上梯时的回调
         记录乘客的目标楼层
         """
-        print(f"    乘客{passenger.id} 上 E{elevator.id} (F{elevator.current_floor} -> F{passenger.destination})")
+        if self.debug:
+            print(f"    乘客{passenger.id} 上 E{elevator.id} (F{elevator.current_floor} -> F{passenger.destination})")
         self.passenger_destinations[elevator.id][passenger.id] = passenger.destination
         
         if self.elevator_states[elevator.id] == 'resting':
             self.elevator_states[elevator.id] = 'scanning'
-            print(f"    电梯 E{elevator.id} 因乘客上梯而激活")
+            if self.debug:
+                print(f"    电梯 E{elevator.id} 因乘客上梯而激活")
 
     def on_passenger_alight(self, elevator: ProxyElevator, passenger: ProxyPassenger, floor: ProxyFloor) -> None:
         """
         乘客下车时的回调
         移除记录的乘客目的地
         """
-        print(f"    乘客{passenger.id} 下 E{elevator.id} 在 F{floor.floor}")
+        if self.debug:
+            print(f"    乘客{passenger.id} 下 E{elevator.id} 在 F{floor.floor}")
         if passenger.id in self.passenger_destinations[elevator.id]:
             del self.passenger_destinations[elevator.id][passenger.id]
 